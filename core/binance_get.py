@@ -1,207 +1,247 @@
+import os
+import contextlib
+import shelve
+import threading
 import requests
+from cachetools import TTLCache, cached
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import hmac
-import hashlib
+import functools
 from datetime import datetime
 from urllib.parse import urlencode
+import orjson
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 BASE_URL = "https://api.binance.com"
+COINM_BASE_URL = "https://dapi.binance.com"
+USDTM_BASE_URL = "https://fapi.binance.com"
+REQUEST_TIMEOUT = 10
+
+# Shared session so consecutive public Binance calls reuse pooled TLS connections; the pool is sized
+# for the concurrent per-wallet fetches in the db scripts, and 429 responses wait out Retry-After
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+)
+for _base in (BASE_URL, COINM_BASE_URL, USDTM_BASE_URL):
+    _SESSION.mount(_base, _ADAPTER)
+
+# Signed calls get no transport-level retries: a resent request would carry a stale timestamp and
+# signature, so _signed_request retries itself and signs every attempt afresh
+_SIGNED_SESSION = requests.Session()
+_SIGNED_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=20)
+for _base in (BASE_URL, COINM_BASE_URL, USDTM_BASE_URL):
+    _SIGNED_SESSION.mount(_base, _SIGNED_ADAPTER)
+
+SIGNED_MAX_ATTEMPTS = 3
+SIGNED_MAX_RETRY_SLEEP = 10
+_RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+# On-disk cache for public market data that rarely (exchangeInfo) or never (past trades) changes
+CACHE_PATH = os.getenv("BINANCE_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".binance_cache"))
+EXCHANGE_INFO_TTL = 24 * 60 * 60
+_CACHE_LOCK = threading.Lock()
+
+@contextlib.contextmanager
+def _open_cache():
+    """Open the shelve cache while holding a thread lock and an exclusive lock on a sidecar file
+
+    Several scripts run in parallel (main.py), and dbm files are not safe to share between processes
+    without the flock. Without fcntl (Windows) the cache is skipped rather than risked.
+    """
+    if fcntl is None:
+        raise OSError("file locking unavailable")
+    with _CACHE_LOCK, open(CACHE_PATH + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            with shelve.open(CACHE_PATH) as db:
+                yield db
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _cache_get(key):
+    try:
+        with _open_cache() as db:
+            return db.get(key)
+    except Exception:
+        # A locked or unreadable cache just means we go to the network
+        return None
+
+def _cache_set(key, value):
+    try:
+        with _open_cache() as db:
+            db[key] = value
+    except Exception:
+        pass
+
+def _json(response):
+    """Decode a response body straight from bytes with orjson"""
+    return orjson.loads(response.content)
+
+@functools.lru_cache(maxsize=4)
+def _secret_bytes(api_secret):
+    """Encode each API secret once per process"""
+    return api_secret.encode()
 
 def get_signature(query_string, api_secret):
     if not api_secret or not query_string:
         raise ValueError("API secret and query string must not be None or empty")
-    return hmac.new(api_secret.encode(), query_string.encode(), hashlib.sha256).hexdigest()
-
-def get_flexible_position(api_key, api_secret):
-    endpoint = "/sapi/v1/simple-earn/flexible/position"
-    timestamp = int(time.time() * 1000)
-    query_string = f"timestamp={timestamp}"
-    signature = get_signature(query_string, api_secret)
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
-    url = f"{BASE_URL}{endpoint}?{query_string}&signature={signature}"
-    response = requests.get(url, headers=headers)
-    return response.json()
-
-def get_locked_position(api_key, api_secret):
-    endpoint = "/sapi/v1/simple-earn/locked/position"
-    timestamp = int(time.time() * 1000)
-    query_string = f"timestamp={timestamp}"
-    signature = get_signature(query_string, api_secret)
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
-    url = f"{BASE_URL}{endpoint}?{query_string}&signature={signature}"
-    response = requests.get(url, headers=headers)
-    return response.json()
-
-def get_user_assets(api_key, api_secret):
-    endpoint = "/sapi/v1/asset/getUserAsset"
-    timestamp = int(time.time() * 1000)
-    query_string = f"timestamp={timestamp}"
-    signature = get_signature(query_string, api_secret)
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
-    url = f"{BASE_URL}{endpoint}?{query_string}&signature={signature}"
-    response = requests.get(url, headers=headers)
-    return response.json()
-
-def get_user_funding_assets(api_key, api_secret):
-    endpoint = "/sapi/v1/asset/get-funding-asset"
-    timestamp = int(time.time() * 1000)
-    query_string = f"timestamp={timestamp}"
-    signature = get_signature(query_string, api_secret)
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
-    url = f"{BASE_URL}{endpoint}?{query_string}&signature={signature}"
-    response = requests.post(url, headers=headers)
-    return response.json()
-
-def get_spot_assets(api_key, api_secret):
-    endpoint = "/api/v3/account"
-    timestamp = int(time.time() * 1000)
-    query_string = f"timestamp={timestamp}"
-    signature = get_signature(query_string, api_secret)
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
-    url = f"{BASE_URL}{endpoint}?{query_string}&signature={signature}"
-    response = requests.get(url, headers=headers)
-    return response.json()
-
+    # hmac.digest is the one-shot OpenSSL HMAC path, no Python-level HMAC object
+    return hmac.digest(_secret_bytes(api_secret), query_string.encode(), "sha256").hex()
+
+_HEADERS_CACHE = {}
+
+def _api_key_headers(api_key):
+    """Return the X-MBX-APIKEY header dict, allocated once per key"""
+    headers = _HEADERS_CACHE.get(api_key)
+    if headers is None:
+        headers = _HEADERS_CACHE[api_key] = {"X-MBX-APIKEY": api_key}
+    return headers
+
+def _retry_sleep(response, attempt):
+    """Seconds to wait before resending a signed request: Retry-After if given, else 0.5s doubling"""
+    retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+    if retry_after.isdigit():
+        return min(int(retry_after), SIGNED_MAX_RETRY_SLEEP)
+    return min(0.5 * 2 ** (attempt - 1), SIGNED_MAX_RETRY_SLEEP)
+
+def _signed_request(method, endpoint, api_key, api_secret, params=None, base_url=BASE_URL):
+    """Sign params (plus timestamp) and send them to a Binance USER_DATA endpoint
+
+    429/5xx responses and connection errors are retried up to SIGNED_MAX_ATTEMPTS times, each
+    attempt with a fresh timestamp and signature so it stays inside recvWindow.
+    """
+    query = {k: v for k, v in (params or {}).items() if v is not None}
+    for attempt in range(1, SIGNED_MAX_ATTEMPTS + 1):
+        query["timestamp"] = int(time.time() * 1000)
+        query.pop("signature", None)
+        query["signature"] = get_signature(urlencode(query), api_secret)
+        try:
+            # requests encodes the dict the same way, so the signed query string is reproduced exactly
+            response = _SIGNED_SESSION.request(method, base_url + endpoint, params=query, headers=_api_key_headers(api_key), timeout=REQUEST_TIMEOUT)
+        except requests.ConnectionError:
+            if attempt == SIGNED_MAX_ATTEMPTS:
+                raise
+            response = None
+        else:
+            if response.status_code not in _RETRY_STATUSES or attempt == SIGNED_MAX_ATTEMPTS:
+                return response
+        time.sleep(_retry_sleep(response, attempt))
+
+def _signed_endpoint(method, endpoint):
+    """Build a module-level call(api_key, api_secret) for a parameterless signed endpoint"""
+    def call(api_key, api_secret):
+        return _json(_signed_request(method, endpoint, api_key, api_secret))
+    return call
+
+get_flexible_position = _signed_endpoint("GET", "/sapi/v1/simple-earn/flexible/position")
+get_locked_position = _signed_endpoint("GET", "/sapi/v1/simple-earn/locked/position")
+get_user_assets = _signed_endpoint("GET", "/sapi/v1/asset/getUserAsset")
+get_user_funding_assets = _signed_endpoint("POST", "/sapi/v1/asset/get-funding-asset")
+get_spot_assets = _signed_endpoint("GET", "/api/v3/account")
+get_deposit_history = _signed_endpoint("GET", "/sapi/v1/capital/deposit/hisrec")
+get_withdraw_history = _signed_endpoint("GET", "/sapi/v1/capital/withdraw/history")
+
+# Binance ticks at ~1 Hz, so repeat lookups within a second are served from memory
+@cached(TTLCache(maxsize=512, ttl=1.0), lock=threading.Lock())
 def get_asset_price(symbol):
     endpoint = "/api/v3/ticker/price"
-    query_string = f"symbol={symbol}"
-    url = f"{BASE_URL}{endpoint}?{query_string}"
-    response = requests.get(url)
-    return response.json()
+    response = _SESSION.get(BASE_URL + endpoint, params={"symbol": symbol}, timeout=REQUEST_TIMEOUT)
+    return _json(response)
 
 def get_account_snapshot(api_key, api_secret, type='SPOT'):
-    endpoint = "/sapi/v1/accountSnapshot"
-    timestamp = int(time.time() * 1000)
-    query_string = f"type={type}&timestamp={timestamp}"
-    signature = get_signature(query_string, api_secret)
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
-    url = f"{BASE_URL}{endpoint}?{query_string}&signature={signature}"
-    response = requests.get(url, headers=headers)
-    return response.json()
-
-def get_deposit_history(api_key, api_secret):
-    endpoint = "/sapi/v1/capital/deposit/hisrec"
-    timestamp = int(time.time() * 1000)
-    query_string = f"timestamp={timestamp}"
-    signature = get_signature(query_string, api_secret)
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
-    url = f"{BASE_URL}{endpoint}?{query_string}&signature={signature}"
-    response = requests.get(url, headers=headers)
-    return response.json()
+    params = {"type": type}
+    return _json(_signed_request("GET", "/sapi/v1/accountSnapshot", api_key, api_secret, params))
 
 def get_trading_history(api_key, api_secret, symbol, start_time=None, end_time=None, limit=500):
-    endpoint = "/api/v3/myTrades"
-    timestamp = int(time.time() * 1000)
-    query_string = f"symbol={symbol}&timestamp={timestamp}&limit={limit}"
-    if start_time:
-        query_string += f"&startTime={start_time}"
-    if end_time:
-        query_string += f"&endTime={end_time}"
-    signature = get_signature(query_string, api_secret)
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
-    url = f"{BASE_URL}{endpoint}?{query_string}&signature={signature}"
-    response = requests.get(url, headers=headers)
-    return response.json()
-
-def get_withdraw_history(api_key, api_secret):
-    endpoint = "/sapi/v1/capital/withdraw/history"
-    timestamp = int(time.time() * 1000)
-    query_string = f"timestamp={timestamp}"
-    signature = get_signature(query_string, api_secret)
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
-    url = f"{BASE_URL}{endpoint}?{query_string}&signature={signature}"
-    response = requests.get(url, headers=headers)
-    return response.json()
+    params = {"symbol": symbol, "limit": limit, "startTime": start_time, "endTime": end_time}
+    return _json(_signed_request("GET", "/api/v3/myTrades", api_key, api_secret, params))
 
 def get_flexible_subscription_record(api_key, api_secret, asset=None, start_time=None, end_time=None, current=1, size=10):
-    endpoint = "/sapi/v1/simple-earn/flexible/history/subscriptionRecord"
-    timestamp = int(time.time() * 1000)
-    query_string = f"timestamp={timestamp}&current={current}&size={size}"
-    if asset:
-        query_string += f"&asset={asset}"
-    if start_time:
-        query_string += f"&startTime={start_time}"
-    if end_time:
-        query_string += f"&endTime={end_time}"
-    signature = get_signature(query_string, api_secret)
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
-    url = f"{BASE_URL}{endpoint}?{query_string}&signature={signature}"
-    response = requests.get(url, headers=headers)
-    return response.json()
+    params = {"current": current, "size": size, "asset": asset, "startTime": start_time, "endTime": end_time}
+    return _json(_signed_request("GET", "/sapi/v1/simple-earn/flexible/history/subscriptionRecord", api_key, api_secret, params))
 
 def get_flexible_redemption_record(api_key, api_secret, asset=None, start_time=None, end_time=None, current=1, size=10):
-    endpoint = "/sapi/v1/simple-earn/flexible/history/redemptionRecord"
-    timestamp = int(time.time() * 1000)
-    query_string = f"timestamp={timestamp}&current={current}&size={size}"
-    if asset:
-        query_string += f"&asset={asset}"
-    if start_time:
-        query_string += f"&startTime={start_time}"
-    if end_time:
-        query_string += f"&endTime={end_time}"
-    signature = get_signature(query_string, api_secret)
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
-    url = f"{BASE_URL}{endpoint}?{query_string}&signature={signature}"
-    response = requests.get(url, headers=headers)
-    return response.json()
+    params = {"current": current, "size": size, "asset": asset, "startTime": start_time, "endTime": end_time}
+    return _json(_signed_request("GET", "/sapi/v1/simple-earn/flexible/history/redemptionRecord", api_key, api_secret, params))
 
 def get_all_tokens():
     endpoint = "/api/v3/exchangeInfo"
     url = f"{BASE_URL}{endpoint}"
-    response = requests.get(url)
-    return response.json()
+    cached = _cache_get("exchangeInfo")
+    if cached and time.time() - cached["saved_at"] < EXCHANGE_INFO_TTL:
+        return cached["data"]
+
+    # Revalidate with whatever validator Binance actually sent last time
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    try:
+        response = _SESSION.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException:
+        # Serve the stale copy rather than failing when Binance is unreachable
+        if cached:
+            return cached["data"]
+        raise
+
+    if response.status_code == 304 and cached:
+        data = cached["data"]
+        # A 304 may omit the validators; keep the ones the cached copy was stored with
+        last_modified = response.headers.get("Last-Modified") or cached.get("last_modified")
+        etag = response.headers.get("ETag") or cached.get("etag")
+    elif response.status_code != 200:
+        # Same for error responses (429, 5xx, ...): a stale copy beats the error payload
+        return cached["data"] if cached else _json(response)
+    else:
+        data = _json(response)
+        last_modified = response.headers.get("Last-Modified")
+        etag = response.headers.get("ETag")
+    _cache_set("exchangeInfo", {
+        "saved_at": time.time(),
+        "last_modified": last_modified,
+        "etag": etag,
+        "data": data
+    })
+    return data
 
 def get_all_orders(api_key, api_secret, symbol, start_time=None, end_time=None, limit=500):
-    endpoint = "/api/v3/allOrders"
-    timestamp = int(time.time() * 1000)
-    query_string = f"symbol={symbol}&timestamp={timestamp}&limit={limit}"
-    if start_time:
-        query_string += f"&startTime={start_time}"
-    if end_time:
-        query_string += f"&endTime={end_time}"
-    signature = get_signature(query_string, api_secret)
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
-    url = f"{BASE_URL}{endpoint}?{query_string}&signature={signature}"
-    response = requests.get(url, headers=headers)
-    return response.json()
+    params = {"symbol": symbol, "limit": limit, "startTime": start_time, "endTime": end_time}
+    return _json(_signed_request("GET", "/api/v3/allOrders", api_key, api_secret, params))
 
 def get_historical_price(symbol, timestamp):
     endpoint = "/api/v3/aggTrades"
-    query_string = f"symbol={symbol}&startTime={timestamp}&endTime={timestamp+60000}&limit=1"
-    url = f"{BASE_URL}{endpoint}?{query_string}"
-    response = requests.get(url)
+    # Trades at a past timestamp never change, so successful lookups are cached permanently
+    cache_key = f"aggTrades:{symbol}:{timestamp}"
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+    params = {"symbol": symbol, "startTime": timestamp, "endTime": timestamp + 60000, "limit": 1}
+    response = _SESSION.get(BASE_URL + endpoint, params=params, timeout=REQUEST_TIMEOUT)
     if response.status_code == 200:
-        data = response.json()
+        data = _json(response)
         if data:
+            _cache_set(cache_key, data[0])
             return data[0]
         else:
             return {"error": "No data found for the given timestamp."}
     else:
-        return {"error": response.json()}
+        return {"error": _json(response)}
 
 def get_coinm_position_risk(api_key, api_secret, marginAsset=None, pair=None, recvWindow=None):
     """
@@ -217,39 +257,12 @@ def get_coinm_position_risk(api_key, api_secret, marginAsset=None, pair=None, re
     - pair (str, optional): Filter by pair (e.g. "BTCUSD")
     - recvWindow (int, optional): The number of milliseconds the request is valid for
     """
-    COINM_BASE_URL = "https://dapi.binance.com"
-    endpoint = "/dapi/v1/positionRisk"
-
-    # Build query params
-    timestamp = int(time.time() * 1000)
-    params = {"timestamp": timestamp}
-    if marginAsset:
-        params["marginAsset"] = marginAsset
-    if pair:
-        params["pair"] = pair
-    if recvWindow:
-        params["recvWindow"] = recvWindow
-
-    # Convert dict to query string
-    query_string = urlencode(params)
-
-    # Sign the query
-    signature = hmac.new(
-        api_secret.encode("utf-8"),
-        query_string.encode("utf-8"),
-        hashlib.sha256
-    ).hexdigest()
-
-    # Construct final URL
-    url = f"{COINM_BASE_URL}{endpoint}?{query_string}&signature={signature}"
-
-    # Make request
-    headers = {"X-MBX-APIKEY": api_key}
-    response = requests.get(url, headers=headers)
+    params = {"marginAsset": marginAsset or None, "pair": pair or None, "recvWindow": recvWindow or None}
+    response = _signed_request("GET", "/dapi/v1/positionRisk", api_key, api_secret, params, base_url=COINM_BASE_URL)
 
     # Attempt JSON parse if valid; otherwise return raw info
     if "application/json" in response.headers.get("Content-Type", ""):
-        return response.json()
+        return _json(response)
     else:
         return {
             "error": f"HTTP {response.status_code}",
@@ -269,37 +282,12 @@ def get_usdtm_position_risk(api_key, api_secret, symbol=None, recvWindow=None):
     - symbol (str, optional): Filter by symbol (e.g. "BTCUSDT")
     - recvWindow (int, optional): The number of milliseconds the request is valid for
     """
-    USDTM_BASE_URL = "https://fapi.binance.com"
-    endpoint = "/fapi/v2/positionRisk"
-
-    # Build query params
-    timestamp = int(time.time() * 1000)
-    params = {"timestamp": timestamp}
-    if symbol:
-        params["symbol"] = symbol
-    if recvWindow:
-        params["recvWindow"] = recvWindow
-
-    # Convert dict to query string
-    query_string = urlencode(params)
-
-    # Sign the query
-    signature = hmac.new(
-        api_secret.encode("utf-8"),
-        query_string.encode("utf-8"),
-        hashlib.sha256
-    ).hexdigest()
-
-    # Construct final URL
-    url = f"{USDTM_BASE_URL}{endpoint}?{query_string}&signature={signature}"
-
-    # Make request
-    headers = {"X-MBX-APIKEY": api_key}
-    response = requests.get(url, headers=headers)
+    params = {"symbol": symbol or None, "recvWindow": recvWindow or None}
+    response = _signed_request("GET", "/fapi/v2/positionRisk", api_key, api_secret, params, base_url=USDTM_BASE_URL)
 
     # Attempt JSON parse if valid; otherwise return raw info
     if "application/json" in response.headers.get("Content-Type", ""):
-        return response.json()
+        return _json(response)
     else:
         return {
             "error": f"HTTP {response.status_code}",
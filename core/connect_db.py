@@ -1,4 +1,6 @@
 import os
+import functools
+import threading
 from dotenv import load_dotenv
 import firebase_admin
 from firebase_admin import credentials, db
@@ -10,29 +12,48 @@ import json
 # Load environment variables from .env file
 load_dotenv()
 
-# Get the base64-encoded service account key from environment variables
-credentials_base64 = os.getenv('FIREBASE_APPLICATION_CREDENTIALS')
-if credentials_base64 is None:
-    raise ValueError("Environment variable FIREBASE_APPLICATION_CREDENTIALS is not set")
-
-# Decode the base64 string to JSON
-try:
-    service_account_key_json = base64.b64decode(credentials_base64).decode('utf-8')
-    service_account_key = json.loads(service_account_key_json)
-except Exception as e:
-    raise ValueError("Error decoding or parsing service account key: " + str(e))
-
-# Get the database URL from environment variables
-database_url = os.getenv('DATABASE_URL')
-if database_url is None:
-    raise ValueError("Environment variable DATABASE_URL is not set")
-
-# Initialize the app with a service account, granting admin privileges
-try:
-    cred = credentials.Certificate(service_account_key)
-    firebase_admin.initialize_app(cred, {
-        'databaseURL': database_url
-    })
-except Exception as e:
-    raise ValueError("Error initializing Firebase app: " + str(e))
+# The Firebase app is created on first use, so importing this module costs nothing
+_app = None
+_app_lock = threading.Lock()
 
+@functools.lru_cache(maxsize=1)
+def _decode_service_account_key(credentials_base64):
+    """Decode the base64 string to the service account key dict"""
+    try:
+        service_account_key_json = base64.b64decode(credentials_base64).decode('utf-8')
+        return json.loads(service_account_key_json)
+    except Exception as e:
+        raise ValueError("Error decoding or parsing service account key: " + str(e))
+
+def init():
+    """Initialize the Firebase app once, returning the existing app on later calls"""
+    global _app
+    with _app_lock:
+        if _app is not None:
+            return _app
+
+        # Get the base64-encoded service account key from environment variables
+        credentials_base64 = os.getenv('FIREBASE_APPLICATION_CREDENTIALS')
+        if credentials_base64 is None:
+            raise ValueError("Environment variable FIREBASE_APPLICATION_CREDENTIALS is not set")
+        service_account_key = _decode_service_account_key(credentials_base64)
+
+        # Get the database URL from environment variables
+        database_url = os.getenv('DATABASE_URL')
+        if database_url is None:
+            raise ValueError("Environment variable DATABASE_URL is not set")
+
+        # Initialize the app with a service account, granting admin privileges
+        try:
+            cred = credentials.Certificate(service_account_key)
+            _app = firebase_admin.initialize_app(cred, {
+                'databaseURL': database_url
+            })
+        except Exception as e:
+            raise ValueError("Error initializing Firebase app: " + str(e))
+        return _app
+
+def get_reference(path):
+    """Database reference at path, initializing Firebase on first call"""
+    init()
+    return db.reference(path)
@@ -0,0 +1,22 @@
+# Multicall3 is deployed at the same address on every EVM chain (Ethereum, BSC, ...)
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [
+    {"inputs": [{"components": [{"name": "target", "type": "address"}, {"name": "allowFailure", "type": "bool"},
+                                {"name": "callData", "type": "bytes"}], "name": "calls", "type": "tuple[]"}],
+     "name": "aggregate3",
+     "outputs": [{"components": [{"name": "success", "type": "bool"}, {"name": "returnData", "type": "bytes"}],
+                  "name": "returnData", "type": "tuple[]"}],
+     "stateMutability": "payable", "type": "function"},
+]
+
+def aggregate3_uints(w3, calls, allow_failure=False):
+    """Run [(contract, fn_name, args)] in a single eth_call through Multicall3.aggregate3 and return the uint256 results
+
+    With allow_failure the batch never reverts as a whole; a call that fails (or returns less
+    than one word) yields None in its slot instead.
+    """
+    multicall = w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+    results = multicall.functions.aggregate3(
+        [(contract.address, allow_failure, contract.encode_abi(fn_name, args=args)) for contract, fn_name, args in calls]
+    ).call()
+    return [int.from_bytes(data[:32], "big") if success and len(data) >= 32 else None for success, data in results]
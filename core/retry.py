@@ -0,0 +1,20 @@
+import random
+
+MAX_RETRY_SLEEP = 60
+# Sheets per-minute quota 429s carry no Retry-After; 6 attempts back off 2+4+8+16+32s, enough to span the window
+SHEETS_MAX_ATTEMPTS = 6
+
+def backoff_delay(error, attempt, base_sleep=1, max_sleep=MAX_RETRY_SLEEP):
+    """Seconds to wait before retry number `attempt` (1-based) after `error`
+
+    Honors a Retry-After header on 429 responses carried by the error (gspread's APIError
+    exposes the response), otherwise backs off exponentially with jitter. binance_get does not
+    raise on HTTP errors - it retries 429/5xx itself and returns the error JSON - so Binance
+    failures seen here always take the exponential path.
+    """
+    response = getattr(error, 'response', None)
+    if response is not None and getattr(response, 'status_code', None) == 429:
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return min(int(retry_after), max_sleep)
+    return min(base_sleep * 2 ** attempt + random.uniform(0, 1), max_sleep)
@@ -0,0 +1,37 @@
+import os
+import base64
+import json
+import functools
+import gspread
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+SCOPES = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+@functools.lru_cache(maxsize=1)
+def get_client():
+    """Authorized gspread client, built once per process from GOOGLE_APPLICATION_CREDENTIALS"""
+    # Get the base64-encoded service account key from environment variables
+    credentials_base64 = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+    if credentials_base64 is None:
+        raise ValueError("Environment variable GOOGLE_APPLICATION_CREDENTIALS is not set")
+
+    # Decode the base64 string to JSON
+    try:
+        service_account_key = json.loads(base64.b64decode(credentials_base64).decode('utf-8'))
+    except Exception as e:
+        raise ValueError("Error decoding or parsing service account key: " + str(e))
+
+    return gspread.service_account_from_dict(service_account_key, scopes=SCOPES)
+
+@functools.lru_cache(maxsize=None)
+def get_spreadsheet(sheet_id=None):
+    """Spreadsheet by key, defaulting to GOOGLE_SHEET_ID"""
+    return get_client().open_by_key(sheet_id or os.getenv('GOOGLE_SHEET_ID'))
+
+@functools.lru_cache(maxsize=None)
+def get_sheet(title, sheet_id=None):
+    """Worksheet by title in the given (or default) spreadsheet"""
+    return get_spreadsheet(sheet_id).worksheet(title)
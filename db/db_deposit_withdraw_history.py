@@ -4,6 +4,11 @@ import core.connect_db as connect_db
 import core.binance_get as binance_get
 import os
 import logging
+import operator
+import functools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from datetime import datetime, timedelta, timezone
 from firebase_admin import db
@@ -25,8 +30,16 @@ API_SECRET4 = os.getenv("API_SECRET4")
 API_KEY5 = os.getenv("API_KEY5")
 API_SECRET5 = os.getenv("API_SECRET5")
 
-# Get a reference to the database
-ref = connect_db.db.reference('new_deposit_withdraw_history_9m')
+# Database path; Firebase is only initialized when the reference is first used
+DB_PATH = 'new_deposit_withdraw_history_9m'
+
+# 'YYYY-MM-DD HH:MM:SS' strings are parsed with datetime.fromisoformat, which is much faster than strptime
+_FMT = '%Y-%m-%d %H:%M:%S'
+GMT_PLUS_7 = timezone(timedelta(hours=7))
+
+# Fields copied verbatim from every Binance deposit/withdrawal record
+_COMMON_KEYS = ('id', 'amount', 'coin', 'status', 'address', 'txId', 'network', 'transferType', 'walletType')
+_get_common_fields = operator.itemgetter(*_COMMON_KEYS)
 
 def get_transaction_history(api_key, api_secret):
     try:
@@ -43,28 +56,29 @@ def get_transaction_history(api_key, api_secret):
         return [], []
 
 def fetch_existing_transactions():
+    """Return the (id, type) pairs already stored in Firebase"""
     try:
-        return ref.get() or {}
+        data = connect_db.get_reference(DB_PATH).get() or {}
     except Exception as e:
         logging.error(f"Error fetching existing transactions: {e}")
-        return {}
+        data = {}
+    return frozenset((value['id'], value['type']) for value in data.values() if 'id' in value and 'type' in value)
 
 def transaction_exists(transaction_id, transaction_type, existing_transactions):
-    return any(value['id'] == transaction_id and value['type'] == transaction_type for value in existing_transactions.values())
+    return (transaction_id, transaction_type) in existing_transactions
 
 def convert_timestamp_to_gmt_plus_7(timestamp):
     if isinstance(timestamp, int):
-        dt = datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc)
+        dt = datetime.fromtimestamp(timestamp / 1000, tz=GMT_PLUS_7)
     else:
-        dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-    dt_gmt_plus_7 = dt + timedelta(hours=7)
-    return dt_gmt_plus_7.strftime('%Y-%m-%d %H:%M:%S')
+        dt = datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).astimezone(GMT_PLUS_7)
+    return dt.strftime(_FMT)
 
 def ensure_timestamp_format(timestamp):
     if isinstance(timestamp, int):
         return timestamp
     try:
-        dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        dt = datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc)
         return int(dt.timestamp() * 1000)
     except ValueError:
         logging.error(f"Invalid timestamp format: {timestamp}")
@@ -73,17 +87,69 @@ def ensure_timestamp_format(timestamp):
 def get_transaction_price(coin_symbol, timestamp):
     if timestamp is None:
         return None
-    price_data = binance_get.get_historical_price(coin_symbol, timestamp)
-    return '1' if coin_symbol == 'USDTUSDT' else price_data.get('p')
+    if coin_symbol == 'USDTUSDT':
+        return '1'
+    try:
+        return get_minute_price(coin_symbol, timestamp // 60000)
+    except LookupError as e:
+        logging.warning(f"No price for {coin_symbol} at {timestamp}: {e}")
+        return None
 
-def push_transaction_to_firebase(transaction_data):
+@functools.lru_cache(maxsize=8192)
+def get_minute_price(coin_symbol, minute):
+    """First trade price for coin_symbol in the given minute; shared by transactions in the same minute
+
+    Raises LookupError when Binance returns no price, so failed lookups are retried rather than cached.
+    """
+    price_data = binance_get.get_historical_price(coin_symbol, minute * 60000)
+    price = price_data.get('p')
+    if price is None:
+        raise LookupError(price_data.get('error', 'no price in response'))
+    return price
+
+# Firebase push IDs: 8 chars of timestamp + 12 random chars, lexicographically ordered by time
+PUSH_CHARS = '-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz'
+_last_push_time = 0
+_last_rand_chars = []
+
+def generate_push_id():
+    """Generate a Firebase-style push ID locally, without a round-trip to the database"""
+    global _last_push_time, _last_rand_chars
+    now = int(time.time() * 1000)
+    duplicate_time = now == _last_push_time
+    _last_push_time = now
+
+    time_chars = []
+    for _ in range(8):
+        time_chars.append(PUSH_CHARS[now % 64])
+        now //= 64
+    push_id = ''.join(reversed(time_chars))
+
+    if not duplicate_time:
+        _last_rand_chars = [random.randrange(64) for _ in range(12)]
+    else:
+        # Same millisecond: increment the random part so IDs stay unique and ordered
+        i = 11
+        while i >= 0 and _last_rand_chars[i] == 63:
+            _last_rand_chars[i] = 0
+            i -= 1
+        if i >= 0:
+            _last_rand_chars[i] += 1
+    return push_id + ''.join(PUSH_CHARS[c] for c in _last_rand_chars)
+
+def push_transactions_to_firebase(pending):
+    """Write all pending {push_id: transaction_data} entries in one multi-location update"""
+    if not pending:
+        return
     try:
-        ref.push(transaction_data)
-        logging.info(f"{transaction_data['type'].capitalize()} transaction {transaction_data['id']} pushed successfully.")
+        connect_db.get_reference(DB_PATH).update(pending)
+        for transaction_data in pending.values():
+            logging.info(f"{transaction_data['type'].capitalize()} transaction {transaction_data['id']} pushed successfully.")
     except Exception as e:
-        logging.error(f"Error pushing {transaction_data['type']} transaction {transaction_data['id']}: {e}")
+        logging.error(f"Error pushing {len(pending)} transaction(s): {e}")
 
 def process_transactions(transactions, transaction_type, wallet, existing_transactions):
+    pending = {}
     for transaction in transactions:
         if transaction_exists(transaction['id'], transaction_type, existing_transactions):
             logging.info(f"{transaction_type.capitalize()} transaction {transaction['id']} already exists. Skipping.")
@@ -99,22 +165,14 @@ def process_transactions(transactions, transaction_type, wallet, existing_transa
         coin_symbol = transaction['coin'] + 'USDT'
         price = get_transaction_price(coin_symbol, timestamp)
 
-        transaction_data = {
+        transaction_data = dict(zip(_COMMON_KEYS, _get_common_fields(transaction)))
+        transaction_data.update({
             'wallet': wallet,
             'type': transaction_type,
-            'id': transaction['id'],
-            'amount': transaction['amount'],
-            'coin': transaction['coin'],
-            'status': transaction['status'],
-            'address': transaction['address'],
-            'txId': transaction['txId'],
             'applyTime': apply_time,
-            'network': transaction['network'],
-            'transferType': transaction['transferType'],
             'confirmTimes': transaction.get('confirmTimes', 'N/A'),
-            'walletType': transaction['walletType'],
             'price': price
-        }
+        })
         
         if transaction_type == 'withdrawal':
             transaction_data.update({
@@ -125,7 +183,9 @@ def process_transactions(transactions, transaction_type, wallet, existing_transa
                 'completeTime': convert_timestamp_to_gmt_plus_7(transaction['completeTime'])
             })
         
-        push_transaction_to_firebase(transaction_data)
+        pending[generate_push_id()] = transaction_data
+
+    push_transactions_to_firebase(pending)
 
 def main():
     existing_transactions = fetch_existing_transactions()
@@ -139,13 +199,19 @@ def main():
         ('wallet5', API_KEY5, API_SECRET5)
     ]
     
+    active_wallets = []
     for wallet_name, api_key, api_secret in wallets:
         if not api_key or not api_secret:
             logging.warning(f"Skipping {wallet_name} - API credentials not properly set")
             continue
-            
+        active_wallets.append((wallet_name, api_key, api_secret))
+    
+    # Binance calls are independent per wallet, so fetch every wallet's history concurrently
+    with ThreadPoolExecutor(max_workers=max(len(active_wallets), 1)) as executor:
+        histories = list(executor.map(lambda wallet: get_transaction_history(wallet[1], wallet[2]), active_wallets))
+    
+    for (wallet_name, _, _), (deposit_history, withdraw_history) in zip(active_wallets, histories):
         logging.info(f"Processing {wallet_name}...")
-        deposit_history, withdraw_history = get_transaction_history(api_key, api_secret)
         process_transactions(deposit_history, 'deposit', wallet_name, existing_transactions)
         process_transactions(withdraw_history, 'withdrawal', wallet_name, existing_transactions)
 
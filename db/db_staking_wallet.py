@@ -4,11 +4,13 @@ import core.connect_db as connect_db
 import core.binance_get as binance_get
 import os
 import logging
+import math
 from dotenv import load_dotenv
 from datetime import datetime, timezone, timedelta
 import firebase_admin
 from firebase_admin import credentials, db
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -27,40 +29,35 @@ API_SECRET4 = os.getenv("API_SECRET4")
 API_KEY5 = os.getenv("API_KEY5")
 API_SECRET5 = os.getenv("API_SECRET5")
 
-# Get a reference to the database
-ref = connect_db.db.reference('new_staking_wallet_9m')
+# Database path; Firebase is only initialized when the reference is first used
+DB_PATH = 'new_staking_wallet_9m'
 
-def convert_timestamp_to_gmt_plus_7(timestamp):
-    if isinstance(timestamp, int):
-        dt = datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc)
-    else:
-        dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-    dt_gmt_plus_7 = dt + timedelta(hours=7)
-    return dt_gmt_plus_7.strftime('%Y-%m-%d %H:%M:%S')
-
-def push_combined_data_to_firebase(api_key, api_secret,wallet_name):
-    # Fetch flexible position data
-    flexible_position = binance_get.get_flexible_position(api_key, api_secret)
-    
-    # Fetch subscription and redemption records
-    now = datetime.now(timezone.utc)
-    now_gmt_plus_7 = now + timedelta(hours=7)
-    current_date_utc = now.strftime('%Y-%m-%d')
+GMT_PLUS_7 = timezone(timedelta(hours=7))
+
+def fetch_staking_records(api_key, api_secret):
+    """Fetch flexible position plus the last 24h of subscription and redemption records concurrently"""
     current_timestamp = int(time.time() * 1000)
     start_time = current_timestamp - 86400000 + 1
     end_time = current_timestamp  # End of the current day in milliseconds
 
-    subscription_records = binance_get.get_flexible_subscription_record(api_key, api_secret, start_time=start_time, end_time=end_time)
-    redemption_records = binance_get.get_flexible_redemption_record(api_key, api_secret, start_time=start_time, end_time=end_time)
-    
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        position_future = executor.submit(binance_get.get_flexible_position, api_key, api_secret)
+        subscription_future = executor.submit(binance_get.get_flexible_subscription_record, api_key, api_secret, start_time=start_time, end_time=end_time)
+        redemption_future = executor.submit(binance_get.get_flexible_redemption_record, api_key, api_secret, start_time=start_time, end_time=end_time)
+        return position_future.result(), subscription_future.result(), redemption_future.result()
+
+def push_combined_data_to_firebase(wallet_name, flexible_position, subscription_records, redemption_records):
     combined_data = {}
 
+    # One clock read shared by the date, time and timestamp fields
+    now = datetime.now(timezone.utc)
+    now_gmt_plus_7 = now.astimezone(GMT_PLUS_7)
+    date_gmt_plus_7 = now_gmt_plus_7.strftime('%Y-%m-%d')
+    time_gmt_plus_7 = now_gmt_plus_7.strftime('%H:%M:%S')
+    timestamp_ms = int(now.timestamp() * 1000)  # Real timestamp in milliseconds
+
     # Prepare flexible position data
     if 'rows' in flexible_position and flexible_position['rows']:
-        now = datetime.now(timezone.utc)
-        now_gmt_plus_7 = convert_timestamp_to_gmt_plus_7(int(now.timestamp() * 1000))
-        date_gmt_plus_7, time_gmt_plus_7 = now_gmt_plus_7.split(' ')
-        
         combined_data.update({
             'wallet_name': wallet_name,
             'totalAmount': flexible_position['rows'][0]['totalAmount'],
@@ -76,30 +73,30 @@ def push_combined_data_to_firebase(api_key, api_secret,wallet_name):
             'autoSubscribe': flexible_position['rows'][0]['autoSubscribe'],
             'date': date_gmt_plus_7,
             'time': time_gmt_plus_7,
-            'timestamp': int(now.timestamp() * 1000)  # Real timestamp in milliseconds
+            'timestamp': timestamp_ms
         })
     else:
-        now = datetime.now(timezone.utc)
-        now_gmt_plus_7 = convert_timestamp_to_gmt_plus_7(int(now.timestamp() * 1000))
-        date_gmt_plus_7, time_gmt_plus_7 = now_gmt_plus_7.split(' ')
         combined_data.update({
             'totalAmount': 0,
             'date': date_gmt_plus_7,
             'time': time_gmt_plus_7,
-            'timestamp': int(now.timestamp() * 1000)  # Real timestamp in milliseconds
+            'timestamp': timestamp_ms
         })
 
+    subscription_rows = subscription_records.get('rows') or []
+    redemption_rows = redemption_records.get('rows') or []
+
     # Calculate subscription and redemption totals
-    subscription_total = sum(float(record['amount']) for record in subscription_records['rows']) if 'rows' in subscription_records else 0
-    redemption_total = sum(float(record['amount']) for record in redemption_records['rows']) if 'rows' in redemption_records else 0
+    subscription_total = math.fsum(float(record['amount']) for record in subscription_rows)
+    redemption_total = math.fsum(float(record['amount']) for record in redemption_rows)
 
     # Add subscription records data
-    if 'rows' in subscription_records and subscription_records['rows']:
-        combined_data['subscription_records'] = subscription_records['rows']
+    if subscription_rows:
+        combined_data['subscription_records'] = subscription_rows
 
     # Add redemption records data
-    if 'rows' in redemption_records and redemption_records['rows']:
-        combined_data['redemption_records'] = redemption_records['rows']
+    if redemption_rows:
+        combined_data['redemption_records'] = redemption_rows
 
     # Calculate subscription_result
     combined_data['subscription_result'] = subscription_total - redemption_total
@@ -108,14 +105,42 @@ def push_combined_data_to_firebase(api_key, api_secret,wallet_name):
     # Push combined data to Firebase
     total_amount = float(combined_data.get('totalAmount', 0))  # Convert totalAmount to float
     if combined_data and (total_amount > 0 or combined_data['subscription_result'] != 0):
-        ref.push(combined_data)
+        connect_db.get_reference(DB_PATH).push(combined_data)
         logging.info("Combined data pushed to Firebase.")
     else:
         logging.error("No data available to push to Firebase.")
 
+def main():
+    wallets = [
+        (API_KEY1, API_SECRET1, 'wallet1'),
+        (API_KEY2, API_SECRET2, 'wallet2'),
+        (API_KEY3, API_SECRET3, 'wallet3'),
+        (API_KEY4, API_SECRET4, 'wallet4'),
+        (API_KEY5, API_SECRET5, 'wallet5'),
+    ]
+
+    active_wallets = []
+    for api_key, api_secret, wallet_name in wallets:
+        if not api_key or not api_secret:
+            logging.warning(f"Skipping {wallet_name} - API credentials not properly set")
+            continue
+        active_wallets.append((api_key, api_secret, wallet_name))
+
+    if not active_wallets:
+        logging.error("No wallets with valid API credentials found")
+        return
+
+    # Fetch every wallet at once, then push in wallet order; one failing wallet doesn't stop the others
+    with ThreadPoolExecutor(max_workers=len(active_wallets)) as executor:
+        futures = [(wallet_name, executor.submit(fetch_staking_records, api_key, api_secret))
+                   for api_key, api_secret, wallet_name in active_wallets]
+
+        for wallet_name, future in futures:
+            try:
+                flexible_position, subscription_records, redemption_records = future.result()
+                push_combined_data_to_firebase(wallet_name, flexible_position, subscription_records, redemption_records)
+            except Exception as e:
+                logging.error(f"Error processing {wallet_name}: {e}")
+
 if __name__ == "__main__":
-    push_combined_data_to_firebase(API_KEY1, API_SECRET1, 'wallet1')
-    push_combined_data_to_firebase(API_KEY2, API_SECRET2, 'wallet2')
-    push_combined_data_to_firebase(API_KEY3, API_SECRET3, 'wallet3')
-    push_combined_data_to_firebase(API_KEY4, API_SECRET4, 'wallet4')
-    push_combined_data_to_firebase(API_KEY5, API_SECRET5, 'wallet5')
+    main()
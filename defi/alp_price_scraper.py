@@ -1,26 +1,96 @@
-import os
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from dotenv import load_dotenv
 import logging
+from logging.handlers import RotatingFileHandler
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-import base64
-import json
-from typing import Optional, Dict, Any
+import orjson
+import bisect
+import functools
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
 from datetime import datetime
+from decimal import Decimal
+from core.multicall import aggregate3_uints
+from core.sheets_client import get_client, get_spreadsheet
+
+try:
+    from web3 import Web3
+    _WEB3_AVAILABLE = True
+except ImportError:
+    Web3 = None
+    _WEB3_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(os.path.join(os.path.dirname(__file__), '..', 'logs', 'alp_price_scraper.log')),
+        RotatingFileHandler(os.path.join(os.path.dirname(__file__), '..', 'logs', 'alp_price_scraper.log'),
+                            maxBytes=5_000_000, backupCount=3, delay=True),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger(__name__)
 
+# Shared HTTP session so asterdex and BSC RPC calls reuse pooled connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_maxsize=10, max_retries=Retry(total=3, backoff_factor=0.3)))
+
+# Worksheet handles keyed by (sheet id, worksheet title), resolved once per process
+_WORKSHEET_CACHE: Dict[tuple, gspread.Worksheet] = {}
+
+# Minimal ERC20 ABI (totalSupply + balanceOf) shared by every contract lookup
+ERC20_ABI = [
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "totalSupply",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "type": "function"
+    },
+    {
+        "constant": True,
+        "inputs": [{"name": "_owner", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "balance", "type": "uint256"}],
+        "type": "function"
+    }
+]
+
+# Request headers and parameters for the asterdex ALP price history API
+_ASTER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+    "Referer": "https://www.asterdex.com/",
+    "Origin": "https://www.asterdex.com"
+}
+MAX_DATA_SIZE = 4320
+_ASTER_PARAMS = {
+    "dataSize": MAX_DATA_SIZE,
+    "channel": "BSC",
+    "currency": "alb"  # ALP token
+}
+
+_WEI_DECIMAL = Decimal(10**18)
+
+def _from_wei(wei: int) -> float:
+    """Convert an 18-decimal token amount exactly, rounding to float only once at the end"""
+    return float(Decimal(wei) / _WEI_DECIMAL)
+
+@functools.lru_cache(maxsize=32)
+def _checksum_address(address: str) -> str:
+    """Checksum an address once; to_checksum_address hashes with Keccak-256"""
+    return Web3.to_checksum_address(address)
+
+SHEET_HEADERS = ['Timestamp', 'ALP Price (USD)', 'TVL', 'APY (%)', 'Date', 'Time', 'ALP Amount']
+
 class ConfigError(Exception):
     """Custom exception for configuration errors"""
     pass
@@ -41,15 +111,18 @@ class ALPPriceScraper:
         self.worksheet_title = 'ALP Price'
         self.alp_contract_address = None
         self.wallet_address = None
+        self._headers_written = False
+        self._pending_rows: List[list] = []
+        self._w3: Dict[str, Any] = {}
+        self._contracts: Dict[tuple, Any] = {}
         
     def load_environment(self) -> None:
         """Load and validate environment variables"""
         try:
             load_dotenv()
             
-            # Load Google credentials
-            credentials_base64 = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-            if not credentials_base64:
+            # Google credentials are decoded by core.sheets_client; just check they are set
+            if not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
                 raise ConfigError("Environment variable GOOGLE_APPLICATION_CREDENTIALS is not set")
             
             # Load Google Sheet ID
@@ -62,38 +135,32 @@ class ALPPriceScraper:
             
             # Load wallet address (required for token balance)
             self.wallet_address = os.getenv("WALLET_ADDRESS")
-            
-            # Decode Google credentials
-            try:
-                credentials_json = base64.b64decode(credentials_base64).decode('utf-8')
-                self.google_credentials = json.loads(credentials_json)
-            except Exception as e:
-                raise ConfigError(f"Error decoding Google credentials: {str(e)}")
                 
         except Exception as e:
-            logger.error(f"Failed to load environment: {e}")
+            logger.error("Failed to load environment: %s", e)
             raise
     
     def setup_google_sheets(self) -> None:
         """Setup Google Sheets connection"""
         try:
-            scope = [
-                "https://spreadsheets.google.com/feeds",
-                "https://www.googleapis.com/auth/drive"
-            ]
+            self.client = get_client()
             
-            creds = ServiceAccountCredentials.from_json_keyfile_dict(
-                self.google_credentials, scope
-            )
-            self.client = gspread.authorize(creds)
+            # Reuse the worksheet handle if this process already resolved it
+            cache_key = (self.google_sheet_id, self.worksheet_title)
+            cached_sheet = _WORKSHEET_CACHE.get(cache_key)
+            if cached_sheet is not None:
+                self.sheet = cached_sheet
+                self._headers_written = True
+                logger.info("Reusing cached worksheet: %s", self.worksheet_title)
+                return
             
             # Open the spreadsheet
-            spreadsheet = self.client.open_by_key(self.google_sheet_id)
+            spreadsheet = get_spreadsheet(self.google_sheet_id)
             
             # Try to get the worksheet, create if it doesn't exist
             try:
                 self.sheet = spreadsheet.worksheet(self.worksheet_title)
-                logger.info(f"Found existing worksheet: {self.worksheet_title}")
+                logger.info("Found existing worksheet: %s", self.worksheet_title)
             except gspread.exceptions.WorksheetNotFound:
                 # Create new worksheet
                 self.sheet = spreadsheet.add_worksheet(
@@ -101,51 +168,64 @@ class ALPPriceScraper:
                     rows=1000,
                     cols=10
                 )
-                # Set headers
-                self.sheet.append_row(['Timestamp', 'ALP Price (USD)', 'TVL', 'APY (%)', 'Date', 'Time', 'ALP Amount'])
-                logger.info(f"Created new worksheet: {self.worksheet_title}")
+                # Queue headers so they go out with the first data row
+                self._pending_rows.insert(0, SHEET_HEADERS)
+                logger.info("Created new worksheet: %s", self.worksheet_title)
             else:
-                # Check if headers exist, if not add them
-                existing_data = self.sheet.get_all_values()
-                if not existing_data or len(existing_data) == 0:
-                    self.sheet.append_row(['Timestamp', 'ALP Price (USD)', 'TVL', 'APY (%)', 'Date', 'Time', 'ALP Amount'])
+                # Check if headers exist (header row only, not the whole sheet), if not add them
+                if not self._headers_written and not self.sheet.batch_get(['A1:G1'])[0]:
+                    self._pending_rows.insert(0, SHEET_HEADERS)
+            self._headers_written = True
+            _WORKSHEET_CACHE[cache_key] = self.sheet
             
-            logger.info(f"Successfully connected to Google Sheet: {self.worksheet_title}")
+            logger.info("Successfully connected to Google Sheet: %s", self.worksheet_title)
             
         except gspread.exceptions.SpreadsheetNotFound:
             raise GoogleSheetsError("Google Sheet not found. Check the ID and permissions.")
         except Exception as e:
             raise GoogleSheetsError(f"Failed to setup Google Sheets: {str(e)}")
     
-    def get_alp_price_from_api(self) -> Dict[str, Any]:
-        """Get ALP price from API directly"""
+    def _history_size(self, period_days: int) -> int:
+        """Probe the feed's sampling interval and return how many entries cover period_days
+        
+        Assumes the feed lists entries newest first and that dataSize keeps the N most recent
+        ones, so a dataSize=2 probe returns the latest interval. If the probe is not strictly
+        newest-first the assumption does not hold (dataSize might keep the oldest entries),
+        and the full MAX_DATA_SIZE history is requested instead.
+        """
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Accept": "application/json",
-                "Content-Type": "application/json",
-                "Referer": "https://www.asterdex.com/",
-                "Origin": "https://www.asterdex.com"
-            }
-            
-            # Parameters for ALP price history
-            params = {
-                "dataSize": 4320,
-                "channel": "BSC",
-                "currency": "alb"  # ALP token
-            }
-            
-            logger.info(f"Calling API: {self.api_endpoint}")
-            logger.info(f"Parameters: {params}")
+            response = _SESSION.post(self.api_endpoint, headers=_ASTER_HEADERS,
+                                     json={**_ASTER_PARAMS, "dataSize": 2}, timeout=10)
+            probe = orjson.loads(response.content).get("data") or []
+            times = [entry.get("time") for entry in probe]
+            if len(times) == 2 and None not in times and times[0] > times[1]:
+                interval_ms = times[0] - times[1]
+                size = math.ceil(period_days * 24 * 60 * 60 * 1000 / interval_ms) + 32
+                logger.info("Price feed samples every %s ms, requesting %s entries", interval_ms, size)
+                return min(MAX_DATA_SIZE, size)
+            logger.warning("Price feed probe is not newest-first, using dataSize=%s", MAX_DATA_SIZE)
+        except Exception as e:
+            logger.warning("Could not probe price feed interval (%s), using dataSize=%s", e, MAX_DATA_SIZE)
+        return MAX_DATA_SIZE
+    
+    def get_alp_price_from_api(self, period_days: int = 60) -> Dict[str, Any]:
+        """Get ALP price from API directly, fetching just enough history for the APY window"""
+        try:
+            params = {**_ASTER_PARAMS, "dataSize": self._history_size(period_days)}
+            logger.info("Calling API: %s", self.api_endpoint)
+            logger.info("Parameters: %s", params)
             
-            response = requests.post(self.api_endpoint, headers=headers, json=params, timeout=10)
+            response = _SESSION.post(self.api_endpoint, headers=_ASTER_HEADERS, json=params, timeout=10)
             
             if response.status_code != 200:
                 error_msg = f"API returned status {response.status_code}: {response.text[:500]}"
                 logger.error(error_msg)
                 raise ScrapingError(error_msg)
             
-            data = response.json()
+            # Decode straight from the raw bytes and release the body before building columns
+            data = orjson.loads(response.content)
+            response.close()
+            del response
             
             # Check if API call was successful
             if not data.get("success", False) or data.get("code") != "000000":
@@ -158,53 +238,56 @@ class ALPPriceScraper:
             if not price_history:
                 raise ScrapingError("No price history data returned from API")
             
-            # Find the latest price (entry with maximum time)
-            latest_entry = max(price_history, key=lambda x: x.get("time", 0))
-            latest_price = latest_entry.get("price")
-            latest_time = latest_entry.get("time")
-            
-            if latest_price is None:
+            # Keep history as two time-ordered columns instead of a list of dicts
+            points = sorted((entry["time"], entry["price"]) for entry in price_history
+                            if entry.get("time") is not None and entry.get("price") is not None)
+            del price_history, data
+            if not points:
                 raise ScrapingError("Could not extract price from API response")
+            times = [t for t, _ in points]
+            prices = [p for _, p in points]
             
-            logger.info(f"Latest ALP price: {latest_price} (time: {latest_time})")
+            # Latest price is the last entry
+            latest_price = prices[-1]
+            latest_time = times[-1]
+            
+            logger.info("Latest ALP price: %s (time: %s)", latest_price, latest_time)
             
             return {
                 'price': latest_price,
                 'time': latest_time,
-                'price_history': price_history
+                'times': times,
+                'prices': prices
             }
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request error: {e}")
+            logger.error("Request error: %s", e)
             raise ScrapingError(f"Failed to fetch price from API: {str(e)}")
         except Exception as e:
-            logger.error(f"Error getting ALP price: {e}")
+            logger.error("Error getting ALP price: %s", e)
             raise ScrapingError(f"Error getting ALP price: {str(e)}")
     
-    def calculate_apy_from_history(self, price_history: list, period_days: int = 60) -> Optional[float]:
+    def calculate_apy_from_history(self, times: List[int], prices: List[float], period_days: int = 60) -> Optional[float]:
         """Calculate APY from price history using simple return annualized
         
         Based on testing, the website shows APY around 14.26% which is closest
         to a 60-day simple return calculation (gives ~14.44%).
         
         Args:
-            price_history: List of price entries with 'price' and 'time' keys
+            times: Entry timestamps in ms, sorted ascending
+            prices: Entry prices aligned with times
             period_days: Number of days to look back (default 60 days based on website calculation)
         
         Returns:
             APY as percentage (e.g., 14.44 for 14.44%)
         """
-        if not price_history or len(price_history) < 2:
+        if not times or len(times) < 2:
             logger.warning("Not enough price history to calculate APY")
             return None
         
         try:
-            # Sort by time (oldest to newest)
-            sorted_history = sorted(price_history, key=lambda x: x.get("time", 0))
-            
-            newest = sorted_history[-1]
-            newest_price = newest.get("price")
-            newest_time = newest.get("time")
+            newest_price = prices[-1]
+            newest_time = times[-1]
             
             if not newest_price or not newest_time:
                 return None
@@ -212,14 +295,13 @@ class ALPPriceScraper:
             # Find price from period_days ago
             target_time = newest_time - (period_days * 24 * 60 * 60 * 1000)
             
-            # Find closest entry to target time
-            closest_entry = min(
-                sorted_history,
-                key=lambda x: abs(x.get("time", 0) - target_time)
-            )
+            # Find closest entry to target time (times is sorted, so bisect)
+            idx = bisect.bisect_left(times, target_time)
+            if idx == len(times) or (idx > 0 and target_time - times[idx - 1] <= times[idx] - target_time):
+                idx -= 1
             
-            closest_price = closest_entry.get("price")
-            closest_time = closest_entry.get("time")
+            closest_price = prices[idx]
+            closest_time = times[idx]
             
             if not closest_price or not closest_time:
                 return None
@@ -229,7 +311,7 @@ class ALPPriceScraper:
             time_diff_days = time_diff_ms / (1000 * 60 * 60 * 24)
             
             if time_diff_days <= 0:
-                logger.warning(f"Invalid time difference: {time_diff_days} days")
+                logger.warning("Invalid time difference: %s days", time_diff_days)
                 return None
             
             # Calculate APY using simple return annualized:
@@ -239,59 +321,54 @@ class ALPPriceScraper:
             days_in_year = 365.0
             apy = price_return * (days_in_year / time_diff_days) * 100
             
-            logger.info(f"Calculated APY: {apy:.2f}% (from {time_diff_days:.1f} days, "
-                       f"price: ${closest_price:.8f} -> ${newest_price:.8f})")
+            logger.info("Calculated APY: %.2f%% (from %.1f days, price: $%.8f -> $%.8f)",
+                        apy, time_diff_days, closest_price, newest_price)
             
             return apy
             
         except Exception as e:
-            logger.error(f"Error calculating APY: {e}")
+            logger.error("Error calculating APY: %s", e)
             return None
     
+    def _get_erc20_contract(self, contract_address: str, rpc_url: str):
+        """Return a cached ERC20 contract bound to a cached Web3 instance for rpc_url"""
+        key = (contract_address, rpc_url)
+        contract = self._contracts.get(key)
+        if contract is None:
+            w3 = self._w3.get(rpc_url)
+            if w3 is None:
+                w3 = self._w3[rpc_url] = Web3(Web3.HTTPProvider(rpc_url, session=_SESSION))
+            contract = self._contracts[key] = w3.eth.contract(address=_checksum_address(contract_address), abi=ERC20_ABI)
+        return contract
+    
     def get_total_supply(self, contract_address: str) -> Optional[float]:
         """Get ALP token total supply using web3"""
         if not contract_address:
             logger.warning("ALP contract address not provided, skipping total supply")
             return None
         
+        if not _WEB3_AVAILABLE:
+            logger.warning("web3 not installed, cannot get total supply")
+            return None
+        
         try:
-            # Try web3 (if available)
-            try:
-                from web3 import Web3
-                rpc_url = os.getenv("BSC_RPC_URL", "https://binance.llamarpc.com")
-                return self._get_total_supply_web3(contract_address, rpc_url)
-            except ImportError:
-                logger.warning("web3 not installed, cannot get total supply")
-                return None
-            
+            rpc_url = os.getenv("BSC_RPC_URL", "https://binance.llamarpc.com")
+            return self._get_total_supply_web3(contract_address, rpc_url)
         except Exception as e:
-            logger.error(f"Error getting total supply: {e}")
+            logger.error("Error getting total supply: %s", e)
             return None
     
     def _get_total_supply_web3(self, contract_address: str, rpc_url: str) -> Optional[float]:
         """Get token total supply using web3"""
         try:
-            from web3 import Web3
-            
-            w3 = Web3(Web3.HTTPProvider(rpc_url))
-            
-            # ERC20 totalSupply ABI
-            abi = [{
-                "constant": True,
-                "inputs": [],
-                "name": "totalSupply",
-                "outputs": [{"name": "", "type": "uint256"}],
-                "type": "function"
-            }]
-            
-            contract = w3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=abi)
+            contract = self._get_erc20_contract(contract_address, rpc_url)
             total_supply_wei = contract.functions.totalSupply().call()
-            total_supply = total_supply_wei / 10**18
+            total_supply = _from_wei(total_supply_wei)
             
-            logger.info(f"Got total supply from web3: {total_supply}")
+            logger.info("Got total supply from web3: %s", total_supply)
             return total_supply
         except Exception as e:
-            logger.error(f"web3 error getting total supply: {e}")
+            logger.error("web3 error getting total supply: %s", e)
             return None
     
     def get_token_balance(self, contract_address: str, wallet_address: str) -> Optional[float]:
@@ -304,53 +381,62 @@ class ALPPriceScraper:
             logger.warning("ALP contract address not provided, skipping token balance")
             return None
         
+        if not _WEB3_AVAILABLE:
+            logger.warning("web3 not installed, cannot use web3 method")
+            return None
+        
         try:
-            # Try web3 (if available)
-            try:
-                from web3 import Web3
-                rpc_url = os.getenv("BSC_RPC_URL", "https://binance.llamarpc.com")
-                return self._get_token_balance_web3(contract_address, wallet_address, rpc_url)
-            except ImportError:
-                logger.warning("web3 not installed, cannot use web3 method")
-                return None
-            
+            rpc_url = os.getenv("BSC_RPC_URL", "https://binance.llamarpc.com")
+            return self._get_token_balance_web3(contract_address, wallet_address, rpc_url)
         except Exception as e:
-            logger.error(f"Error getting token balance: {e}")
+            logger.error("Error getting token balance: %s", e)
             return None
     
     def _get_token_balance_web3(self, contract_address: str, wallet_address: str, rpc_url: str) -> Optional[float]:
         """Get token balance using web3"""
         try:
-            from web3 import Web3
-            
-            w3 = Web3(Web3.HTTPProvider(rpc_url))
-            
-            # ERC20 balanceOf ABI
-            abi = [{
-                "constant": True,
-                "inputs": [{"name": "_owner", "type": "address"}],
-                "name": "balanceOf",
-                "outputs": [{"name": "balance", "type": "uint256"}],
-                "type": "function"
-            }]
+            contract = self._get_erc20_contract(contract_address, rpc_url)
+            balance_wei = contract.functions.balanceOf(_checksum_address(wallet_address)).call()
+            balance = _from_wei(balance_wei)
             
-            contract = w3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=abi)
-            balance_wei = contract.functions.balanceOf(Web3.to_checksum_address(wallet_address)).call()
-            balance = balance_wei / 10**18
-            
-            logger.info(f"Got token balance from web3: {balance}")
+            logger.info("Got token balance from web3: %s", balance)
             return balance
         except Exception as e:
-            logger.error(f"web3 error: {e}")
+            logger.error("web3 error: %s", e)
             return None
     
+    def get_supply_and_balance(self, contract_address: str, wallet_address: Optional[str]) -> tuple[Optional[float], Optional[float]]:
+        """Get ALP total supply and wallet balance, folding both eth_calls into one Multicall3 call"""
+        rpc_url = os.getenv("BSC_RPC_URL", "https://binance.llamarpc.com")
+        try:
+            return self._get_supply_and_balance_multicall(contract_address, wallet_address, rpc_url)
+        except Exception as e:
+            logger.warning("Multicall3 request failed (%s), falling back to separate calls", e)
+        
+        total_supply = self.get_total_supply(contract_address)
+        balance = self.get_token_balance(contract_address, wallet_address) if wallet_address else None
+        return total_supply, balance
+    
+    def _get_supply_and_balance_multicall(self, contract_address: str, wallet_address: Optional[str], rpc_url: str) -> tuple[Optional[float], Optional[float]]:
+        """Run totalSupply() and balanceOf(wallet) through Multicall3.aggregate3 in a single eth_call"""
+        contract = self._get_erc20_contract(contract_address, rpc_url)
+        calls = [(contract, "totalSupply", [])]
+        if wallet_address:
+            calls.append((contract, "balanceOf", [_checksum_address(wallet_address)]))
+        
+        values = [None if wei is None else _from_wei(wei)
+                  for wei in aggregate3_uints(self._w3[rpc_url], calls, allow_failure=True)]
+        
+        total_supply = values[0]
+        balance = values[1] if wallet_address else None
+        logger.info("Got total supply %s and balance %s from Multicall3", total_supply, balance)
+        return total_supply, balance
+    
     def update_google_sheet(self, data: Dict[str, Any]) -> bool:
         """Update Google Sheet with ALP price and ALP Amount"""
         try:
-            now = datetime.now()
-            timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
-            date = now.strftime('%Y-%m-%d')
-            time_str = now.strftime('%H:%M:%S')
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            date, time_str = timestamp[:10], timestamp[11:]
             
             # Format values for display
             price = data.get('price', '')
@@ -375,17 +461,38 @@ class ALPPriceScraper:
             # Format ALP amount if it exists
             alp_amount_display = f"{alp_amount:.6f}" if alp_amount else ''
             
-            # Append new row
+            # Queue new row; flush() writes all pending rows in one request
             row_data = [timestamp, price, tvl_display, apy_display, date, time_str, alp_amount_display]
-            self.sheet.append_row(row_data)
+            self._pending_rows.append(row_data)
             
-            logger.info(f"Successfully updated Google Sheet: Price={price}, TVL={tvl_display}, APY={apy_display}, ALP Amount={alp_amount_display} at {timestamp}")
+            logger.info("Queued Google Sheet row: Price=%s, TVL=%s, APY=%s, ALP Amount=%s at %s", price, tvl_display, apy_display, alp_amount_display, timestamp)
             return True
             
         except Exception as e:
-            logger.error(f"Error updating Google Sheet: {e}")
+            logger.error("Error updating Google Sheet: %s", e)
             raise GoogleSheetsError(f"Failed to update sheet: {str(e)}")
     
+    def flush(self) -> int:
+        """Write all queued rows with a single values:append request"""
+        if not self._pending_rows:
+            return 0
+        
+        try:
+            self.sheet.append_rows(
+                self._pending_rows,
+                value_input_option='USER_ENTERED',
+                insert_data_option='INSERT_ROWS',
+                table_range='A1'
+            )
+            written = len(self._pending_rows)
+            self._pending_rows = []
+            logger.info("Successfully wrote %s row(s) to Google Sheet", written)
+            return written
+            
+        except Exception as e:
+            logger.error("Error flushing rows to Google Sheet: %s", e)
+            raise GoogleSheetsError(f"Failed to flush rows: {str(e)}")
+    
     def run(self) -> None:
         """Main execution method"""
         try:
@@ -395,42 +502,51 @@ class ALPPriceScraper:
             self.load_environment()
             logger.info("Environment loaded successfully")
             
-            # Setup Google Sheets
-            self.setup_google_sheets()
-            logger.info("Google Sheets setup completed")
+            # Sheet setup, price API and BSC RPC are independent I/O, so run them concurrently
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                sheet_future = executor.submit(self.setup_google_sheets)
+                price_future = executor.submit(self.get_alp_price_from_api)
+                chain_future = None
+                if self.alp_contract_address:
+                    logger.info("Getting ALP total supply and token balance...")
+                    chain_future = executor.submit(self.get_supply_and_balance, self.alp_contract_address, self.wallet_address)
+                
+                sheet_future.result()
+                logger.info("Google Sheets setup completed")
+                
+                # Get ALP price from API
+                api_data = price_future.result()
+                
+                # Get total supply (for TVL) and wallet balance in one RPC round-trip
+                total_supply, alp_balance = chain_future.result() if chain_future else (None, None)
             
-            # Get ALP price from API
-            api_data = self.get_alp_price_from_api()
             if not api_data.get('price'):
                 raise ScrapingError("Failed to get ALP price from API")
             
             # Calculate APY from price history
             # Based on testing, website uses ~60 days for APY calculation (gives ~14.26%)
-            price_history = api_data.get('price_history', [])
+            times = api_data.get('times', [])
+            prices = api_data.get('prices', [])
             apy = None
-            if price_history:
+            if times:
                 # Use 60 days period (matches website's calculation method)
-                apy = self.calculate_apy_from_history(price_history, period_days=60)
+                apy = self.calculate_apy_from_history(times, prices, period_days=60)
                 if apy is None:
                     # Fallback: try with available data if 60 days not available
-                    sorted_history = sorted(price_history, key=lambda x: x.get("time", 0))
-                    if len(sorted_history) >= 2:
-                        oldest_time = sorted_history[0].get("time", 0)
-                        newest_time = sorted_history[-1].get("time", 0)
-                        available_days = (newest_time - oldest_time) / (1000 * 60 * 60 * 24)
+                    if len(times) >= 2:
+                        available_days = (times[-1] - times[0]) / (1000 * 60 * 60 * 24)
                         if available_days > 0:
                             # Use minimum of 60 days or available days
                             period = min(60, int(available_days))
-                            apy = self.calculate_apy_from_history(price_history, period_days=period)
+                            apy = self.calculate_apy_from_history(times, prices, period_days=period)
             
             # Calculate TVL = total_supply × price
             tvl = None
             if self.alp_contract_address:
-                logger.info(f"Getting ALP total supply for TVL calculation...")
-                total_supply = self.get_total_supply(self.alp_contract_address)
                 if total_supply is not None and api_data.get('price'):
                     tvl = total_supply * api_data['price']
-                    logger.info(f"Calculated TVL: ${tvl:,.2f} (Total Supply: {total_supply:,.2f} × Price: ${api_data['price']:.8f})")
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info(f"Calculated TVL: ${tvl:,.2f} (Total Supply: {total_supply:,.2f} × Price: ${api_data['price']:.8f})")
                 else:
                     logger.warning("Could not calculate TVL (missing total supply or price)")
             
@@ -441,13 +557,11 @@ class ALPPriceScraper:
                 'apy': apy,  # Calculated from price history
             }
             
-            # Get ALP token balance if contract and wallet addresses are provided
+            # Record ALP token balance if contract and wallet addresses are provided
             if self.alp_contract_address and self.wallet_address:
-                logger.info(f"Getting ALP token balance for wallet: {self.wallet_address}")
-                alp_balance = self.get_token_balance(self.alp_contract_address, self.wallet_address)
                 if alp_balance is not None:
                     data['alp_amount'] = alp_balance
-                    logger.info(f"ALP token balance: {alp_balance}")
+                    logger.info("ALP token balance: %s", alp_balance)
                 else:
                     logger.warning("Could not get ALP token balance")
                     data['alp_amount'] = None
@@ -457,19 +571,20 @@ class ALPPriceScraper:
             
             # Update Google Sheet
             self.update_google_sheet(data)
+            self.flush()
             logger.info("ALP data recorded successfully")
             
         except ConfigError as e:
-            logger.error(f"Configuration error: {e}")
+            logger.error("Configuration error: %s", e)
             raise
         except GoogleSheetsError as e:
-            logger.error(f"Google Sheets error: {e}")
+            logger.error("Google Sheets error: %s", e)
             raise
         except ScrapingError as e:
-            logger.error(f"Scraping error: {e}")
+            logger.error("Scraping error: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
+            logger.error("Unexpected error: %s", e)
             raise
 
 def main():
@@ -479,7 +594,7 @@ def main():
         scraper.run()
         logger.info("ALP price scraper completed successfully")
     except Exception as e:
-        logger.error(f"ALP price scraper failed: {e}")
+        logger.error("ALP price scraper failed: %s", e)
         exit(1)
 
 if __name__ == "__main__":
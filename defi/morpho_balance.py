@@ -7,8 +7,12 @@ Vaults:
   2. sky.money USDT Risk Capital (0x2bD3A438...) — underlying USDT (6 dec)
 """
 import os
+import sys
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from core.multicall import aggregate3_uints
+
 load_dotenv()
 
 WALLET = os.getenv("WALLET_ADDRESS", "0x68Bc6dCb7793369a59289ddc5479F6DF417975E7")
@@ -44,6 +48,12 @@ VAULT_ABI = [
 ]
 
 
+def _vault_balance(vault_info, shares, assets_raw):
+    """รวมผลของ vault เดียวเป็น dict"""
+    assets = assets_raw / (10 ** vault_info["asset_decimals"])
+    return {"shares": shares, "assets_raw": assets_raw, "assets": assets, **vault_info}
+
+
 def get_vault_balance(w3, vault_info, wallet):
     """อ่าน balance จาก ERC4626 vault ตัวเดียว"""
     from web3 import Web3
@@ -54,11 +64,29 @@ def get_vault_balance(w3, vault_info, wallet):
     )
     shares = contract.functions.balanceOf(wallet).call()
     if shares == 0:
-        return {"shares": 0, "assets_raw": 0, "assets": 0.0, **vault_info}
+        return _vault_balance(vault_info, 0, 0)
 
     assets_raw = contract.functions.convertToAssets(shares).call()
-    assets = assets_raw / (10 ** vault_info["asset_decimals"])
-    return {"shares": shares, "assets_raw": assets_raw, "assets": assets, **vault_info}
+    return _vault_balance(vault_info, shares, assets_raw)
+
+
+def get_vault_balances_batched(w3, wallet):
+    """อ่าน balance ทุก vault ด้วย 2 eth_call: balanceOf ทั้งหมด แล้ว convertToAssets ของ vault ที่มี shares"""
+    from web3 import Web3
+
+    contracts = [
+        w3.eth.contract(address=Web3.to_checksum_address(vault_info["address"]), abi=VAULT_ABI)
+        for vault_info in VAULTS
+    ]
+    shares = aggregate3_uints(w3, [(contract, "balanceOf", [wallet]) for contract in contracts])
+
+    held = [i for i, s in enumerate(shares) if s]
+    assets_raw = {}
+    if held:
+        assets = aggregate3_uints(w3, [(contracts[i], "convertToAssets", [shares[i]]) for i in held])
+        assets_raw = dict(zip(held, assets))
+
+    return [_vault_balance(vault_info, shares[i], assets_raw.get(i, 0)) for i, vault_info in enumerate(VAULTS)]
 
 
 def get_all_balances():
@@ -71,14 +99,15 @@ def get_all_balances():
         return None
 
     wallet = Web3.to_checksum_address(WALLET)
-    results = []
-    total = 0.0
 
-    for vault_info in VAULTS:
-        bal = get_vault_balance(w3, vault_info, wallet)
-        results.append(bal)
-        total += bal["assets"]
+    try:
+        results = get_vault_balances_batched(w3, wallet)
+    except Exception as e:
+        # RPC ที่ไม่มี Multicall3 หรือ call ล้มเหลว — อ่านทีละ vault แบบเดิม
+        print(f"⚠️ Multicall3 ไม่สำเร็จ ({e}) — อ่านทีละ vault")
+        results = [get_vault_balance(w3, vault_info, wallet) for vault_info in VAULTS]
 
+    total = sum(bal["assets"] for bal in results)
     return {"vaults": results, "total_usd": total}
 
 
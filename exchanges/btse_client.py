@@ -1,32 +1,131 @@
 import os
+import functools
+import socket
 import time
 import hmac
 import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.request import ACCEPT_ENCODING
 import json
+import orjson
 import logging
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from dotenv import load_dotenv
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cache lifetimes (seconds) for slow-changing responses
+PRODUCTS_TTL = 60
+ACCOUNT_BALANCE_TTL = 5
+
+PERMISSION_DENIED_MESSAGE = "not allowed for current API Key"
+
+# Every BTSE call is signed, so retries happen in _make_request with a fresh nonce and signature
+# rather than in urllib3, which would resend the same signed request
+MAX_ATTEMPTS = 3
+MAX_RETRY_SLEEP = 10
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+def _retry_sleep(response: Optional[requests.Response], attempt: int) -> float:
+    """Seconds to wait before retry number `attempt`: Retry-After if given, else 0.25s doubling, capped"""
+    retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+    if retry_after.isdigit():
+        return min(int(retry_after), MAX_RETRY_SLEEP)
+    return min(0.25 * 2 ** (attempt - 1), MAX_RETRY_SLEEP)
+
 class BTSEError(Exception):
     """Custom exception for BTSE API errors"""
-    pass
+    
+    def __init__(self, msg: str, *, status_code: Optional[int] = None, permission_denied: bool = False):
+        super().__init__(msg)
+        self.status_code = status_code
+        self.permission_denied = permission_denied
 
 class ConfigError(Exception):
     """Custom exception for configuration errors"""
     pass
 
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter that enables TCP keepalive so idle pooled connections survive between polls"""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
 class BTSEClient:
     """BTSE API client for fetching earn/invest data"""
     
+    PRODUCTS_EP = '/api/v3.3/invest/products'
+    HISTORY_EP = '/api/v3.3/invest/history'
+    ACCOUNT_EP = '/api/v3.3/user/account'
+    # Candidate position endpoints, in order of preference
+    POSITION_EPS = (
+        '/api/v3.3/invest/orders',
+        '/api/v3.3/invest/positions',
+        '/api/v3.3/invest/active',
+        '/api/v3.3/invest/current'
+    )
+    
     def __init__(self):
         self.api_key = None
         self.api_secret = None
+        self._api_secret_bytes = None
+        self._hmac_template = None
         self.base_url = 'https://api.btse.com/spot'
+        self._url = {ep: self.base_url + ep for ep in (self.PRODUCTS_EP, self.HISTORY_EP, self.ACCOUNT_EP, *self.POSITION_EPS)}
+        
+        self._last_nonce = 0
+        self._nonce_lock = threading.Lock()
+        
+        # Short-lived response cache: key -> (fetched_at, value)
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._cache_lock = threading.Lock()
+        
+        # ETag validators per (endpoint, params): key -> (etag, decoded payload)
+        self._etags: Dict[tuple, Tuple[str, Any]] = {}
+        
+        # Pooled session so consecutive calls reuse the TLS connection to api.btse.com;
+        # no transport-level retries, see _make_request
+        self.session = requests.Session()
+        self.session.mount('https://api.btse.com', _KeepAliveAdapter(pool_connections=2, pool_maxsize=8))
+        # ACCEPT_ENCODING advertises br/zstd only when a decoder is installed, so urllib3 can always decompress
+        self.session.headers.update({'Connection': 'keep-alive', 'Accept-Encoding': ACCEPT_ENCODING})
+    
+    def _cached(self, key: str, ttl: float, fetch: Callable[[], Any]) -> Any:
+        """Return the cached value for key if younger than ttl, otherwise fetch and store it"""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+        if entry and time.time() - entry[0] < ttl:
+            return entry[1]
+        
+        value = fetch()
+        with self._cache_lock:
+            self._cache[key] = (time.time(), value)
+        return value
+    
+    def clear_cache(self) -> None:
+        """Drop all cached responses and ETag validators"""
+        with self._cache_lock:
+            self._cache.clear()
+        self._etags.clear()
+    
+    def close(self) -> None:
+        """Close the underlying HTTP session"""
+        self.session.close()
+    
+    def __enter__(self) -> 'BTSEClient':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
         
     def load_environment(self) -> None:
         """Load and validate environment variables"""
@@ -44,139 +143,156 @@ class BTSEClient:
                     f"BTSE_API_SECRET: {'Set' if self.api_secret else 'NOT SET'}"
                 )
                 
+            self._api_secret_bytes = self.api_secret.encode('utf-8')
+            # Pre-keyed HMAC; copying it per request skips the SHA-384 key setup
+            self._hmac_template = hmac.new(self._api_secret_bytes, digestmod=hashlib.sha384)
             logger.info("BTSE API credentials loaded successfully")
                 
         except Exception as e:
-            logger.error(f"Failed to load environment: {e}")
+            logger.error("Failed to load environment: %s", e)
             raise
     
-    def _generate_signature(self, method: str, endpoint: str, params: Optional[Dict] = None, body: Optional[Dict] = None) -> tuple:
-        """Generate HMAC signature for BTSE API authentication"""
-        try:
-            nonce = str(int(time.time() * 1000))
-            
-            # For BTSE API, the signature format is: endpoint + nonce + body
-            message = endpoint + nonce
-            
-            if body:
-                message += json.dumps(body, separators=(',', ':'))
-            
-            signature = hmac.new(
-                self.api_secret.encode('utf-8'),
-                message.encode('utf-8'),
-                hashlib.sha384
-            ).hexdigest()
-            
-            return nonce, signature
-        except Exception as e:
-            logger.error(f"Error generating signature: {e}")
-            raise BTSEError(f"Failed to generate signature: {e}")
+    def _build_headers(self, endpoint: str, body: Optional[Dict] = None) -> Dict[str, str]:
+        """Sign endpoint + nonce (+ body) and return the authenticated request headers"""
+        # Millisecond nonce, kept strictly increasing for concurrent requests
+        with self._nonce_lock:
+            nonce_ms = max(time.time_ns() // 1_000_000, self._last_nonce + 1)
+            self._last_nonce = nonce_ms
+        nonce = str(nonce_ms)
+        
+        # For BTSE API, the signature format is: endpoint + nonce + body
+        message = f"{endpoint}{nonce}".encode('utf-8')
+        
+        if body:
+            message += json.dumps(body, separators=(',', ':')).encode('utf-8')
+        
+        signer = self._hmac_template.copy()
+        signer.update(message)
+        
+        return {
+            'request-api': self.api_key,
+            'request-nonce': nonce,
+            'request-sign': signer.hexdigest(),
+            'Content-Type': 'application/json'
+        }
     
-    def _get_headers(self, method: str, endpoint: str, params: Optional[Dict] = None, body: Optional[Dict] = None) -> Dict[str, str]:
-        """Generate headers for BTSE API requests"""
-        try:
-            nonce, signature = self._generate_signature(method, endpoint, params, body)
-            
-            headers = {
-                'request-api': self.api_key,
-                'request-nonce': nonce,
-                'request-sign': signature,
-                'Content-Type': 'application/json'
-            }
-            return headers
-        except Exception as e:
-            logger.error(f"Error generating headers: {e}")
-            raise BTSEError(f"Failed to generate headers: {e}")
+    def _response_error(self, response: requests.Response) -> BTSEError:
+        """Build a BTSEError for a non-200 response, classifying permission failures once"""
+        error_msg = f"API request failed with status {response.status_code}: {response.text}"
+        logger.error(error_msg)
+        permission_denied = response.status_code == 403 or PERMISSION_DENIED_MESSAGE in response.text
+        return BTSEError(error_msg, status_code=response.status_code, permission_denied=permission_denied)
     
     def _make_request(self, url: str, endpoint: str, method: str = 'GET', params: Optional[Dict] = None, data: Optional[Dict] = None) -> Dict[str, Any]:
         """Make authenticated request to BTSE API"""
         try:
-            headers = self._get_headers(method, endpoint, params, data)
+            is_get = method.upper() == 'GET'
+            if not is_get and method.upper() != 'POST':
+                raise BTSEError(f"Unsupported HTTP method: {method}")
+            
+            # Revalidate GETs we have seen before; an unchanged resource comes back as an empty 304
+            etag_key = (endpoint, tuple(sorted(params.items())) if params else ())
+            validator = self._etags.get(etag_key) if is_get else None
             
             # Log response details
-            logger.info(f"API Request: {method} {url}")
+            logger.debug("API Request: %s %s", method, url)
             if params:
-                logger.info(f"Params: {params}")
+                logger.debug("Params: %s", params)
             
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, params=params, timeout=30)
-            elif method.upper() == 'POST':
-                response = requests.post(url, headers=headers, json=data, timeout=30)
-            else:
-                raise BTSEError(f"Unsupported HTTP method: {method}")
+            # Only GETs are retried (POSTs may not be idempotent); every attempt is signed afresh
+            attempts = MAX_ATTEMPTS if is_get else 1
+            for attempt in range(1, attempts + 1):
+                headers = self._build_headers(endpoint, data)
+                if validator:
+                    headers['If-None-Match'] = validator[0]
+                try:
+                    if is_get:
+                        response = self.session.get(url, headers=headers, params=params, timeout=30)
+                    else:
+                        response = self.session.post(url, headers=headers, json=data, timeout=30)
+                except requests.exceptions.ConnectionError:
+                    if attempt == attempts:
+                        raise
+                    response = None
+                else:
+                    if response.status_code not in RETRY_STATUSES or attempt == attempts:
+                        break
+                delay = _retry_sleep(response, attempt)
+                logger.debug("Retrying %s %s in %.2fs (attempt %s/%s)", method, url, delay, attempt + 1, attempts)
+                time.sleep(delay)
             
-            logger.info(f"Response Status: {response.status_code}")
+            logger.debug("Response Status: %s", response.status_code)
             
+            if response.status_code == 304 and validator:
+                return validator[1]
             if response.status_code == 200:
-                return response.json()
+                payload = orjson.loads(response.content)
+                etag = response.headers.get('ETag')
+                if etag and is_get:
+                    self._etags[etag_key] = (etag, payload)
+                return payload
             else:
-                error_msg = f"API request failed with status {response.status_code}: {response.text}"
-                logger.error(error_msg)
-                raise BTSEError(error_msg)
+                raise self._response_error(response)
                 
+        except BTSEError:
+            raise
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request error: {e}")
+            logger.error("Request error: %s", e)
             raise BTSEError(f"Request failed: {e}")
         except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error: {e}")
+            logger.error("JSON decode error: %s", e)
             raise BTSEError(f"Failed to parse response: {e}")
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
+            logger.error("Unexpected error: %s", e)
             raise BTSEError(f"Unexpected error: {e}")
     
     def get_earn_products(self) -> List[Dict[str, Any]]:
+        """Fetch available earn products from BTSE (cached for PRODUCTS_TTL seconds)"""
+        return self._cached('products', PRODUCTS_TTL, self._fetch_earn_products)
+    
+    def _fetch_earn_products(self) -> List[Dict[str, Any]]:
         """Fetch available earn products from BTSE"""
+        logger.info("Fetching earn products...")
+        return self._fetch_list(self.PRODUCTS_EP, label="earn products")
+    
+    @staticmethod
+    def _unwrap_list(response: Any) -> List[Dict[str, Any]]:
+        """Normalise a BTSE payload (bare list, {'data': [...]}, or single object) to a list"""
+        if isinstance(response, list):
+            return response
+        if isinstance(response, dict) and 'data' in response:
+            return response['data']
+        return [response] if response else []
+    
+    def _fetch_list(self, endpoint: str, params: Optional[Dict] = None, label: str = "records") -> List[Dict[str, Any]]:
+        """Request an endpoint and return its payload as a list"""
         try:
-            endpoint = '/api/v3.3/invest/products'
-            url = self.base_url + endpoint
-            
-            logger.info("Fetching earn products...")
-            response = self._make_request(url, endpoint)
-            
-            if isinstance(response, list):
-                products = response
-            elif isinstance(response, dict) and 'data' in response:
-                products = response['data']
-            else:
-                products = [response] if response else []
-            
-            logger.info(f"Successfully fetched {len(products)} earn products")
-            return products
-            
+            items = self._unwrap_list(self._make_request(self._url[endpoint], endpoint, params=params))
+            logger.debug("Successfully fetched %s %s", len(items), label)
+            return items
         except Exception as e:
-            logger.error(f"Error fetching earn products: {e}")
+            logger.error("Error fetching %s: %s", label, e)
             raise
     
     def get_earn_positions(self) -> List[Dict[str, Any]]:
         """Fetch user's earn positions/investments"""
         try:
             # Try multiple possible endpoints for positions
-            endpoints_to_try = [
-                '/api/v3.3/invest/orders',
-                '/api/v3.3/invest/positions', 
-                '/api/v3.3/invest/active',
-                '/api/v3.3/invest/current'
-            ]
+            endpoints_to_try = self.POSITION_EPS
             
             for endpoint in endpoints_to_try:
                 try:
-                    url = self.base_url + endpoint
-                    logger.info(f"Trying endpoint: {endpoint}")
+                    url = self._url[endpoint]
+                    logger.debug("Trying endpoint: %s", endpoint)
                     response = self._make_request(url, endpoint)
                     
-                    if isinstance(response, list):
-                        positions = response
-                    elif isinstance(response, dict) and 'data' in response:
-                        positions = response['data']
-                    else:
-                        positions = [response] if response else []
-                    
-                    logger.info(f"Successfully fetched {len(positions)} earn positions from {endpoint}")
+                    positions = self._unwrap_list(response)
+                    logger.debug("Successfully fetched %s earn positions from %s", len(positions), endpoint)
                     return positions
                     
                 except BTSEError as e:
-                    if "not allowed for current API Key" in str(e):
-                        logger.warning(f"API key lacks permissions for {endpoint}")
+                    if e.permission_denied:
+                        logger.warning("API key lacks permissions for %s", endpoint)
                         continue
                     else:
                         raise
@@ -186,47 +302,29 @@ class BTSEClient:
             return []
             
         except Exception as e:
-            logger.error(f"Error fetching earn positions: {e}")
+            logger.error("Error fetching earn positions: %s", e)
             raise
     
     def get_earn_history(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Fetch user's earn transaction history"""
-        try:
-            endpoint = '/api/v3.3/invest/history'
-            url = self.base_url + endpoint
-            params = {'limit': limit}
-            
-            logger.info(f"Fetching earn history (limit: {limit})...")
-            response = self._make_request(url, endpoint, params=params)
-            
-            if isinstance(response, list):
-                history = response
-            elif isinstance(response, dict) and 'data' in response:
-                history = response['data']
-            else:
-                history = [response] if response else []
-            
-            logger.info(f"Successfully fetched {len(history)} earn history records")
-            return history
-            
-        except Exception as e:
-            logger.error(f"Error fetching earn history: {e}")
-            raise
+        logger.info("Fetching earn history (limit: %s)...", limit)
+        return self._fetch_list(self.HISTORY_EP, params={'limit': limit}, label="earn history records")
     
     def get_account_balance(self) -> Dict[str, Any]:
+        """Fetch account balance information (cached for ACCOUNT_BALANCE_TTL seconds)"""
+        return self._cached('account_balance', ACCOUNT_BALANCE_TTL, self._fetch_account_balance)
+    
+    def _fetch_account_balance(self) -> Dict[str, Any]:
         """Fetch account balance information"""
         try:
-            endpoint = '/api/v3.3/user/account'
-            url = self.base_url + endpoint
-            
             logger.info("Fetching account balance...")
-            response = self._make_request(url, endpoint)
+            response = self._make_request(self._url[self.ACCOUNT_EP], self.ACCOUNT_EP)
             
-            logger.info("Successfully fetched account balance")
+            logger.debug("Successfully fetched account balance")
             return response
             
         except Exception as e:
-            logger.error(f"Error fetching account balance: {e}")
+            logger.error("Error fetching account balance: %s", e)
             raise
     
     def check_api_permissions(self) -> Dict[str, bool]:
@@ -238,38 +336,45 @@ class BTSEClient:
             'account': False
         }
         
+        # The four probes are independent, so fire them concurrently
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            products_future = executor.submit(self.get_earn_products)
+            positions_future = executor.submit(self.get_earn_positions)
+            history_future = executor.submit(self.get_earn_history, limit=1)
+            account_future = executor.submit(self.get_account_balance)
+        
         # Test products endpoint
         try:
-            self.get_earn_products()
+            products_future.result()
             permissions['products'] = True
             logger.info("✅ API key has access to products endpoint")
         except Exception as e:
-            logger.warning(f"❌ API key lacks access to products endpoint: {e}")
+            logger.warning("❌ API key lacks access to products endpoint: %s", e)
         
         # Test positions endpoint
         try:
-            positions = self.get_earn_positions()
+            positions = positions_future.result()
             if positions is not None:
                 permissions['positions'] = True
                 logger.info("✅ API key has access to positions endpoint")
         except Exception as e:
-            logger.warning(f"❌ API key lacks access to positions endpoint: {e}")
+            logger.warning("❌ API key lacks access to positions endpoint: %s", e)
         
         # Test history endpoint
         try:
-            self.get_earn_history(limit=1)
+            history_future.result()
             permissions['history'] = True
             logger.info("✅ API key has access to history endpoint")
         except Exception as e:
-            logger.warning(f"❌ API key lacks access to history endpoint: {e}")
+            logger.warning("❌ API key lacks access to history endpoint: %s", e)
         
         # Test account endpoint
         try:
-            self.get_account_balance()
+            account_future.result()
             permissions['account'] = True
             logger.info("✅ API key has access to account endpoint")
         except Exception as e:
-            logger.warning(f"❌ API key lacks access to account endpoint: {e}")
+            logger.warning("❌ API key lacks access to account endpoint: %s", e)
         
         return permissions
     
@@ -278,52 +383,65 @@ class BTSEClient:
         try:
             logger.info("Fetching all earn data...")
             
+            # Products, positions, history and balance are independent requests
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                products_future = executor.submit(self.get_earn_products)
+                positions_future = executor.submit(self.get_earn_positions)
+                history_future = executor.submit(self.get_earn_history)
+                balance_future = executor.submit(self.get_account_balance)
+            
             data = {
-                'products': self.get_earn_products(),
+                'products': products_future.result(),
                 'timestamp': time.time()
             }
             
             # Try to fetch user-specific data, but don't fail if permissions are insufficient
             try:
-                data['positions'] = self.get_earn_positions()
+                data['positions'] = positions_future.result()
             except BTSEError as e:
-                if "not allowed for current API Key" in str(e):
+                if e.permission_denied:
                     logger.warning("API key lacks permissions for positions endpoint")
                     data['positions'] = []
                 else:
                     raise
             
             try:
-                data['history'] = self.get_earn_history()
+                data['history'] = history_future.result()
             except BTSEError as e:
-                if "not allowed for current API Key" in str(e):
+                if e.permission_denied:
                     logger.warning("API key lacks permissions for history endpoint")
                     data['history'] = []
                 else:
                     raise
             
             try:
-                data['account_balance'] = self.get_account_balance()
+                data['account_balance'] = balance_future.result()
             except BTSEError as e:
-                if "not allowed for current API Key" in str(e) or "404" in str(e):
+                if e.permission_denied or e.status_code == 404:
                     logger.warning("API key lacks permissions for account balance endpoint or endpoint not found")
                     data['account_balance'] = {}
                 else:
                     raise
             
-            logger.info("Successfully fetched all available earn data")
+            logger.debug("Successfully fetched all available earn data")
             return data
             
         except Exception as e:
-            logger.error(f"Error fetching all earn data: {e}")
+            logger.error("Error fetching all earn data: %s", e)
             raise
 
+@functools.lru_cache(maxsize=1)
+def get_client() -> BTSEClient:
+    """Return a process-wide BTSEClient with credentials loaded, so its session pool is shared"""
+    client = BTSEClient()
+    client.load_environment()
+    return client
+
 def test_btse_client():
     """Test function to verify BTSE client functionality"""
     try:
         # Initialize client
-        client = BTSEClient()
-        client.load_environment()
+        client = get_client()
         
         print("=" * 50)
         print("BTSE Client Test")
@@ -361,7 +479,7 @@ def test_btse_client():
         
     except Exception as e:
         print(f"Test failed: {e}")
-        logger.error(f"Test failed: {e}")
+        logger.error("Test failed: %s", e)
 
 if __name__ == "__main__":
     test_btse_client()
@@ -7,17 +7,14 @@ Make sure to set your BTSE_API_KEY and BTSE_API_SECRET environment variables.
 """
 
 import os
-import json
-from btse_client import BTSEClient, BTSEError, ConfigError
+import orjson
+from btse_client import BTSEError, ConfigError, get_client
 
 def main():
     """Main function to demonstrate BTSE client usage"""
     try:
-        # Initialize the BTSE client
-        client = BTSEClient()
-        
-        # Load environment variables (BTSE_API_KEY and BTSE_API_SECRET)
-        client.load_environment()
+        # Get the shared BTSE client (loads BTSE_API_KEY and BTSE_API_SECRET on first use)
+        client = get_client()
         
         print("🚀 BTSE Earn/Invest Data Fetcher")
         print("=" * 50)
@@ -62,8 +59,9 @@ def main():
         
         # Save data to file (optional)
         output_file = 'btse_earn_data.json'
-        with open(output_file, 'w') as f:
-            json.dump(all_data, f, indent=2, default=str)
+        # orjson serialises straight to UTF-8 bytes
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(all_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str))
         print(f"\n💾 Data saved to: {output_file}")
         
         print(f"\n✅ Successfully fetched BTSE earn/invest data!")
@@ -1,5 +1,5 @@
 import subprocess
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 def run_script(script_name):
     try:
@@ -16,11 +16,11 @@ def main():
         "wallets/cc_wallet_1945.py"
     ]
 
-    for script in scripts:
-        print(f"Running {script}...")
-        run_script(script)
-        print(f"Execution script {script} done...")
-        time.sleep(60)
+    # The wallet scripts are independent, so run them side by side instead of one after another
+    print(f"Running {', '.join(scripts)}...")
+    with ThreadPoolExecutor(max_workers=len(scripts)) as executor:
+        for script, _ in zip(scripts, executor.map(run_script, scripts)):
+            print(f"Execution script {script} done...")
 
 if __name__ == "__main__":
     main()
@@ -291,7 +291,9 @@ def main():
     while True:
         try:
             schedule.run_pending()
-            time.sleep(60)  # Check every minute for pending jobs
+            # Sleep until the next job is due instead of polling every minute
+            idle_seconds = schedule.idle_seconds()
+            time.sleep(max(1, idle_seconds) if idle_seconds is not None else 60)
         except KeyboardInterrupt:
             logging.info("Scheduler stopped by user")
             break
@@ -4,44 +4,20 @@ from dotenv import load_dotenv
 import core.connect_db as connect_db
 import gspread
 import core.binance_get as binance_get
-from oauth2client.service_account import ServiceAccountCredentials
-from datetime import datetime
+from core.sheets_client import get_sheet
 
-import base64
 from io import StringIO
-import json
+import operator
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Get the base64-encoded service account key from environment variables
-credentials_base64 = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-if credentials_base64 is None:
-    raise ValueError("Environment variable GOOGLE_APPLICATION_CREDENTIALS is not set")
-
-# Decode the base64 string to JSON
-try:
-    GOOGLE_APPLICATION_CREDENTIALS_json = base64.b64decode(credentials_base64).decode('utf-8')
-    GOOGLE_APPLICATION_CREDENTIALS = json.loads(GOOGLE_APPLICATION_CREDENTIALS_json)
-except Exception as e:
-    raise ValueError("Error decoding or parsing service account key: " + str(e))
-
-# Google Sheets setup
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-try:
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(GOOGLE_APPLICATION_CREDENTIALS, scope)
-    client = gspread.authorize(creds)
-except Exception as e:
-    print(f"Error setting up Google Sheets credentials: {e}")
-    exit()
-
-# Google Sheet ID
-google_sheet_id = os.getenv('GOOGLE_SHEET_ID')
+# Worksheet name
 worksheet_title = 'Deposit & Withdrawal'
 
 # Open the Google Sheet
 try:
-    sheet = client.open_by_key(google_sheet_id).worksheet(worksheet_title)
+    sheet = get_sheet(worksheet_title)
 except gspread.exceptions.SpreadsheetNotFound:
     print("Error: The specified Google Sheet was not found. Check the ID and permissions.")
     exit()
@@ -60,12 +36,12 @@ except Exception as e:
     print(f"Error clearing the Google Sheet: {e}")
     exit()
 
-# Get a reference to the database
-ref = connect_db.db.reference('new_deposit_withdraw_history_9m')
+# Database path; Firebase is only initialized when the reference is first used
+DB_PATH = 'new_deposit_withdraw_history_9m'
 
 # Fetch transactions from Firebase
 try:
-    transactions = ref.get() or {}
+    transactions = connect_db.get_reference(DB_PATH).get() or {}
 except Exception as e:
     print(f"Error fetching transactions from Firebase: {e}")
     transactions = {}
@@ -109,23 +85,19 @@ for key, transaction in transactions.items():
     ]
     rows.append(row)
 
+# 'YYYY-MM-DD' and 'HH:MM:SS' strings sort chronologically as plain strings, so no parsing is needed
 # # Sort rows by date and time in descending order (newest to oldest)
-# rows.sort(key=lambda x: datetime.strptime(f"{x[3]} {x[4]}", '%Y-%m-%d %H:%M:%S'), reverse=True)
+# rows.sort(key=operator.itemgetter(3, 4), reverse=True)
 
 # Sort rows by date and time in ascending order (oldest to newest)
-rows.sort(key=lambda x: datetime.strptime(f"{x[3]} {x[4]}", '%Y-%m-%d %H:%M:%S'))
+rows.sort(key=operator.itemgetter(3, 4))
 
-
-# Check if column A is empty and fill data if empty
+# The sheet was cleared above, so write the rows without re-reading column A
 try:
-    column_a = sheet.col_values(1)[1:]  # Skip header
-    if not any(column_a):
-        sheet.update('A2:M', rows, value_input_option='USER_ENTERED')
-        print("Data successfully written to the Google Sheet.")
-    else:
-        print("Column A is not empty. Data not written to the Google Sheet.")
+    sheet.update('A2:M', rows, value_input_option='USER_ENTERED')
+    print("Data successfully written to the Google Sheet.")
 except Exception as e:
-    print(f"Error checking or updating the Google Sheet: {e}")
+    print(f"Error updating the Google Sheet: {e}")
 
 # Set number format for 'Amount' and 'Amount (USDT)' columns
 try:
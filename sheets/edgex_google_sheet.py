@@ -1,12 +1,16 @@
-import requests
-import os
-from dotenv import load_dotenv
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import itertools
+import json
 import logging
 from datetime import datetime, timezone, timedelta
+
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import base64
-import json
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from core.sheets_client import get_sheet, get_spreadsheet
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,42 +18,23 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Load environment variables from .env file
 load_dotenv()
 
-# Get the base64-encoded service account key from environment variables
-credentials_base64 = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-google_sheet_id = os.getenv("GOOGLE_SHEET_ID")
-
-if credentials_base64 is None:
-    raise ValueError("Environment variable GOOGLE_APPLICATION_CREDENTIALS is not set")
-
-# Decode the base64 string to JSON
-try:
-    GOOGLE_APPLICATION_CREDENTIALS_json = base64.b64decode(credentials_base64).decode('utf-8')
-    GOOGLE_APPLICATION_CREDENTIALS = json.loads(GOOGLE_APPLICATION_CREDENTIALS_json)
-except Exception as e:
-    raise ValueError("Error decoding or parsing service account key: " + str(e))
-
-# Google Sheets setup
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-try:
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(GOOGLE_APPLICATION_CREDENTIALS, scope)
-    client = gspread.authorize(creds)
-except Exception as e:
-    logging.error(f"Error setting up Google Sheets credentials: {e}")
-    exit()
+# Shared session so EdgeX API calls reuse one keep-alive connection
+_SESSION = requests.Session()
+_SESSION.mount("https://pro.edgex.exchange", HTTPAdapter(pool_connections=1, pool_maxsize=4))
 
 # Google Sheet ID and Worksheet name
 worksheet_title = 'EdgeX Vault Trends'  # You can change this worksheet name
 
 # Open the Google Sheet
 try:
-    sheet = client.open_by_key(google_sheet_id).worksheet(worksheet_title)
+    sheet = get_sheet(worksheet_title)
 except gspread.exceptions.SpreadsheetNotFound:
     logging.error("Error: The specified Google Sheet was not found. Check the ID and permissions.")
     exit()
 except gspread.exceptions.WorksheetNotFound:
     # Create worksheet if it doesn't exist
     try:
-        spreadsheet = client.open_by_key(google_sheet_id)
+        spreadsheet = get_spreadsheet()
         sheet = spreadsheet.add_worksheet(title=worksheet_title, rows=1000, cols=10)
         logging.info(f"Created new worksheet: {worksheet_title}")
     except Exception as e:
@@ -85,7 +70,7 @@ def fetch_edgex_vault_trends(vault_id=1, trend_type="dailyReturnRate", vault_typ
         logging.info(f"Fetching data from EdgeX API: {url}")
         logging.info(f"Parameters: {params}")
         
-        response = requests.get(url, params=params, timeout=10)
+        response = _SESSION.get(url, params=params, timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -165,64 +150,53 @@ def setup_sheet_headers():
     except Exception as e:
         logging.error(f"Error setting up sheet headers: {e}")
 
-def get_existing_timestamps():
+def _fetch_state():
     """
-    Get all existing timestamps from the Google Sheet (column D)
-    Check all rows to see what data already exists
+    Read columns A-D below the header in one request
     
     Returns:
-        Set of existing timestamps (as strings)
+        Rows starting at sheet row 2 (trailing empty cells and rows omitted)
     """
-    try:
-        # Get all values from the sheet
-        all_values = sheet.get_all_values()
-        
-        if len(all_values) <= 1:  # Only headers or empty
-            return set()
-        
-        # Extract timestamps from column D (index 3), skip header row
-        existing_timestamps = set()
-        for row in all_values[1:]:  # Skip header row
-            if len(row) > 3 and row[3] and row[3].strip():  # Check if column D exists and has value
-                existing_timestamps.add(row[3].strip())
-        
-        logging.info(f"Found {len(existing_timestamps)} existing records in sheet")
-        return existing_timestamps
-        
-    except Exception as e:
-        logging.error(f"Error reading existing timestamps: {e}")
-        return set()
+    return sheet.get('A2:D')
 
-def find_next_empty_row_in_column_a():
+def get_existing_timestamps(rows):
     """
-    Find the first empty row by checking column A (check all rows)
+    Get all existing timestamps from column D
+    
+    Args:
+        rows: Rows returned by _fetch_state()
     
     Returns:
-        Row number (1-based) of the first empty row in column A
+        Set of existing timestamps (as strings)
     """
-    try:
-        # Get all values from column A only
-        column_a_values = sheet.col_values(1)  # Column A is index 1
-        
-        # Find first empty row (skip header row 1)
-        for i in range(1, len(column_a_values)):
-            if not column_a_values[i] or column_a_values[i].strip() == "":
-                return i + 1  # Return 1-based row number
-        
-        # If all rows are filled, return next row
-        return len(column_a_values) + 1
-        
-    except Exception as e:
-        logging.error(f"Error finding next empty row: {e}")
-        # Default to row 2 if error (row 1 is header)
-        return 2
+    # Extract timestamps from column D (index 3)
+    existing_timestamps = set()
+    for row in rows:
+        if len(row) > 3 and row[3] and row[3].strip():  # Check if column D exists and has value
+            existing_timestamps.add(row[3].strip())
+    
+    logging.info(f"Found {len(existing_timestamps)} existing records in sheet")
+    return existing_timestamps
+
+def iter_empty_rows_in_column_a(rows):
+    """
+    Yield row numbers (1-based) whose column A is empty: gaps inside the
+    existing data first, then the rows after it
+    
+    Args:
+        rows: Rows returned by _fetch_state()
+    """
+    for row_number, row in enumerate(rows, start=2):
+        if not row or row[0].strip() == "":
+            yield row_number
+    yield from itertools.count(len(rows) + 2)
 
 def fill_google_sheet(data_list):
     """
     Fill Google Sheet with EdgeX vault trends data
-    - Check all rows to see what data already exists (by timestamp)
-    - For new data, find the first empty row in column A and add it there
-    - Only update columns A-D
+    - Read the sheet once to see what data already exists (by timestamp)
+    - Place each new record in the next empty row of column A
+    - Write all new rows (columns A-D only) in a single request
     
     Args:
         data_list: List of records from API response
@@ -232,11 +206,13 @@ def fill_google_sheet(data_list):
             logging.warning("No data to write to sheet")
             return
         
-        # Get all existing timestamps from sheet (check all rows)
-        existing_timestamps = get_existing_timestamps()
+        # One read serves both the existing timestamps and the empty-row lookup
+        rows = _fetch_state()
+        existing_timestamps = get_existing_timestamps(rows)
+        empty_rows = iter_empty_rows_in_column_a(rows)
         
         # Process each record from API
-        new_records_count = 0
+        updates = []
         skipped_count = 0
         
         for record in data_list:
@@ -247,29 +223,23 @@ def fill_google_sheet(data_list):
             if snapshot_time in existing_timestamps:
                 skipped_count += 1
                 continue
-            
-            # Find the first empty row in column A
-            empty_row = find_next_empty_row_in_column_a()
+            existing_timestamps.add(snapshot_time)
             
             # Convert timestamp to GMT+7
             date_str, time_str = convert_to_gmt7(snapshot_time)
             
-            # Create row data: [Date, Time, Daily Return Rate, Timestamp] - only 4 columns
-            row_data = [[date_str, time_str, amount, snapshot_time]]
-            
-            # Update only column A-D in the empty row
-            range_str = f"A{empty_row}:D{empty_row}"
-            sheet.update(range_name=range_str, values=row_data, value_input_option='USER_ENTERED')
-            
-            new_records_count += 1
-            logging.info(f"Added new record to row {empty_row}: {date_str} {time_str}")
+            # Row data: [Date, Time, Daily Return Rate, Timestamp] - only 4 columns
+            empty_row = next(empty_rows)
+            updates.append({'range': f"A{empty_row}:D{empty_row}", 'values': [[date_str, time_str, amount, snapshot_time]]})
+            logging.info(f"Queued new record for row {empty_row}: {date_str} {time_str}")
         
         # Summary
-        if new_records_count > 0:
-            logging.info(f"Successfully added {new_records_count} new records to Google Sheet (columns A-D only)")
+        if updates:
+            sheet.batch_update(updates, value_input_option='USER_ENTERED')
+            logging.info(f"Successfully added {len(updates)} new records to Google Sheet (columns A-D only)")
         if skipped_count > 0:
             logging.info(f"Skipped {skipped_count} records that already exist in sheet")
-        if new_records_count == 0 and skipped_count == 0:
+        if not updates and skipped_count == 0:
             logging.warning("No rows to write")
             
     except Exception as e:
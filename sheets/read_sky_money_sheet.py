@@ -3,12 +3,11 @@
 อ่าน Google Sheet worksheet "Sky Money" — แสดง header และตัวอย่างข้อมูล (ไม่เขียน)
 ใช้ discuss ว่าจะใส่อะไรได้บ้าง
 """
-import os
-import json
-import base64
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from core.sheets_client import get_spreadsheet
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,22 +18,12 @@ if not credentials_base64 or not google_sheet_id:
     print("ต้องตั้ง GOOGLE_APPLICATION_CREDENTIALS และ GOOGLE_SHEET_ID ใน .env")
     exit(1)
 
-try:
-    creds_dict = json.loads(base64.b64decode(credentials_base64).decode("utf-8"))
-except Exception as e:
-    print("Error decode credentials:", e)
-    exit(1)
-
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-client = gspread.authorize(creds)
-
 # หา worksheet "Sky Money" (ลองหลายแบบ)
 TARGET_NAMES = ["Sky Money", "Sky money", "SkyMoney", "sky money"]
 
 def main():
     try:
-        spreadsheet = client.open_by_key(google_sheet_id)
+        spreadsheet = get_spreadsheet(google_sheet_id)
     except Exception as e:
         print("เปิด spreadsheet ไม่ได้:", e)
         return
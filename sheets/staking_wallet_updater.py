@@ -70,12 +70,12 @@ except Exception as e:
     logging.error(f"Error clearing the Google Sheet: {e}")
     exit()
 
-# Get a reference to the database
-ref = connect_db.db.reference('new_staking_wallet_9m')
+# Database path; Firebase is only initialized when the reference is first used
+DB_PATH = 'new_staking_wallet_9m'
 
 def fetch_data_from_firebase():
     try:
-        data = ref.get()
+        data = connect_db.get_reference(DB_PATH).get()
         logging.info("Data fetched from Firebase successfully.")
         return data
     except Exception as e:
@@ -3,11 +3,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from dotenv import load_dotenv
 import logging
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from core.binance_get import get_asset_price, get_coinm_position_risk
+from core.retry import backoff_delay, SHEETS_MAX_ATTEMPTS
+from core.sheets_client import get_client, get_sheet
 import time
-import base64
-import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
@@ -45,15 +44,15 @@ class CashAndCarryProcessor:
         self.api_secret = None
         self.wallet_name = 'Wallet 1 (6165)'
         self.worksheet_title = 'Cash&Carry'
+        self._pos_by_symbol: Dict[str, Dict] = {}
         
     def load_environment(self) -> None:
         """Load and validate environment variables"""
         try:
             load_dotenv()
             
-            # Load Google credentials
-            credentials_base64 = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-            if not credentials_base64:
+            # Google credentials are decoded by core.sheets_client; just check they are set
+            if not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
                 raise ConfigError("Environment variable GOOGLE_APPLICATION_CREDENTIALS is not set")
             
             # Load Google Sheet ID
@@ -71,13 +70,6 @@ class CashAndCarryProcessor:
                     f"API_KEY1: {'Set' if self.api_key else 'NOT SET'}, "
                     f"API_SECRET1: {'Set' if self.api_secret else 'NOT SET'}"
                 )
-            
-            # Decode Google credentials
-            try:
-                credentials_json = base64.b64decode(credentials_base64).decode('utf-8')
-                self.google_credentials = json.loads(credentials_json)
-            except Exception as e:
-                raise ConfigError(f"Error decoding Google credentials: {str(e)}")
                 
         except Exception as e:
             logger.error(f"Failed to load environment: {e}")
@@ -86,18 +78,11 @@ class CashAndCarryProcessor:
     def setup_google_sheets(self) -> None:
         """Setup Google Sheets connection"""
         try:
-            scope = [
-                "https://spreadsheets.google.com/feeds",
-                "https://www.googleapis.com/auth/drive"
-            ]
-            
-            creds = ServiceAccountCredentials.from_json_keyfile_dict(
-                self.google_credentials, scope
-            )
-            self.client = gspread.authorize(creds)
+            # Shared client: one authorized requests session reused for every sheet call
+            self.client = get_client()
             
             # Open the worksheet
-            self.sheet = self.client.open_by_key(self.google_sheet_id).worksheet(self.worksheet_title)
+            self.sheet = get_sheet(self.worksheet_title, self.google_sheet_id)
             logger.info(f"Successfully connected to Google Sheet: {self.worksheet_title}")
             
         except gspread.exceptions.SpreadsheetNotFound:
@@ -107,23 +92,24 @@ class CashAndCarryProcessor:
         except Exception as e:
             raise GoogleSheetsError(f"Failed to setup Google Sheets: {str(e)}")
     
-    def update_cell_with_retry(self, row: int, col: int, value: Any, max_attempts: int = 3, sleep_time: int = 300) -> bool:
-        """Update a cell with retry logic"""
+    def batch_update_with_retry(self, updates: List[Dict[str, Any]], max_attempts: int = SHEETS_MAX_ATTEMPTS, base_sleep: float = 1) -> bool:
+        """Write a list of {'range', 'values'} updates in one request, with retry logic"""
         for attempt in range(1, max_attempts + 1):
             try:
-                self.sheet.update_cell(row, col, value)
-                logger.debug(f"Successfully updated cell ({row}, {col}) with value: {value}")
+                self.sheet.batch_update(updates, value_input_option='USER_ENTERED')
+                logger.debug(f"Successfully updated {len(updates)} range(s)")
                 return True
             except Exception as e:
-                logger.warning(f"Attempt {attempt}/{max_attempts} failed to update cell ({row}, {col}): {e}")
+                logger.warning(f"Attempt {attempt}/{max_attempts} failed to batch update {len(updates)} range(s): {e}")
                 if attempt < max_attempts:
-                    logger.info(f"Retrying in {sleep_time} seconds...")
-                    time.sleep(sleep_time)
+                    delay = backoff_delay(e, attempt, base_sleep)
+                    logger.info(f"Retrying in {delay:.1f} seconds...")
+                    time.sleep(delay)
                 else:
-                    logger.error(f"Failed to update cell ({row}, {col}) after {max_attempts} attempts")
+                    logger.error(f"Failed to batch update sheet after {max_attempts} attempts")
                     return False
     
-    def execute_binance_api_with_retry(self, api_function, *args, max_attempts: int = 3, sleep_time: int = 300) -> Optional[Any]:
+    def execute_binance_api_with_retry(self, api_function, *args, max_attempts: int = 3, base_sleep: float = 1) -> Optional[Any]:
         """Execute a Binance API function with retry logic"""
         for attempt in range(1, max_attempts + 1):
             try:
@@ -133,8 +119,9 @@ class CashAndCarryProcessor:
             except Exception as e:
                 logger.warning(f"Binance API attempt {attempt}/{max_attempts} failed: {e}")
                 if attempt < max_attempts:
-                    logger.info(f"Retrying in {sleep_time} seconds...")
-                    time.sleep(sleep_time)
+                    delay = backoff_delay(e, attempt, base_sleep)
+                    logger.info(f"Retrying in {delay:.1f} seconds...")
+                    time.sleep(delay)
                 else:
                     logger.error(f"Failed to call Binance API after {max_attempts} attempts")
                     return None
@@ -176,26 +163,30 @@ class CashAndCarryProcessor:
         if wallet != self.wallet_name:
             return False
         
-        if not contract_symbol or contract_symbol.strip() == "":
+        if not contract_symbol or contract_symbol.isspace():
             logger.debug(f"Skipping row: No contract symbol")
             return False
         
-        if not start_date or start_date.strip() == "":
+        if not start_date or start_date.isspace():
             logger.info(f"Skipping row: Start date (Column C) is empty for {contract_symbol}")
             return False
         
-        if end_date and end_date.strip() != "":
+        if end_date and not end_date.isspace():
             logger.info(f"Skipping row: End date (Column D) already filled for {contract_symbol}")
             return False
         
         return True
     
-    def find_matching_position(self, contract_symbol: str, coinm_positions: List[Dict]) -> Optional[Dict]:
-        """Find matching position in coinm positions"""
+    def index_positions(self, coinm_positions: List[Dict]) -> None:
+        """Index coinm positions by symbol, keeping the first entry per symbol"""
+        self._pos_by_symbol = {}
         for position in coinm_positions:
-            if isinstance(position, dict) and position.get('symbol') == contract_symbol:
-                return position
-        return None
+            if isinstance(position, dict) and 'symbol' in position:
+                self._pos_by_symbol.setdefault(position['symbol'], position)
+    
+    def find_matching_position(self, contract_symbol: str) -> Optional[Dict]:
+        """Find matching position in coinm positions"""
+        return self._pos_by_symbol.get(contract_symbol)
     
     def process_position_data(self, matching_position: Dict, btc_price: float) -> tuple[float, float, float]:
         """Extract and calculate position data"""
@@ -209,34 +200,24 @@ class CashAndCarryProcessor:
             logger.error(f"Error processing position data: {e}")
             raise
     
-    def update_sheet_row(self, row_index: int, future_price: float, btc_amount: float, btc_price: float) -> bool:
-        """Update sheet row with position data"""
-        try:
-            # Update columns K, L, and M
-            success_k = self.update_cell_with_retry(row_index, 11, future_price)  # Column K
-            success_l = self.update_cell_with_retry(row_index, 12, btc_amount)    # Column L
-            success_m = self.update_cell_with_retry(row_index, 13, btc_price)     # Column M
-            
-            if all([success_k, success_l, success_m]):
-                logger.info(f"Successfully updated row {row_index}")
-                return True
-            else:
-                logger.error(f"Failed to update some cells in row {row_index}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error updating sheet row {row_index}: {e}")
-            return False
+    def build_row_update(self, row_index: int, future_price: float, btc_amount: float, btc_price: float) -> Dict[str, Any]:
+        """Build the batch_update entry for columns K, L and M of a row"""
+        return {'range': f'K{row_index}:M{row_index}', 'values': [[future_price, btc_amount, btc_price]]}
     
     def process_sheet_data(self, coinm_positions: List[Dict], btc_price: float) -> None:
         """Process all sheet data"""
         try:
-            all_values = self.sheet.get_all_values()
+            self.index_positions(coinm_positions)
+            
+            # Only columns A:D are read, from row 3 down (rows 1-2 are headers)
+            rows = self.sheet.batch_get(['A3:D'])[0]
             processed_count = 0
             skipped_count = 0
+            updates = []
+            processed_rows = []
             
             # Process data starting from row 3
-            for row_index, row in enumerate(all_values[2:], start=3):
+            for row_index, row in enumerate(rows, start=3):
                 try:
                     # Extract row data
                     wallet = row[0] if len(row) > 0 else ""
@@ -250,19 +231,15 @@ class CashAndCarryProcessor:
                         continue
                     
                     # Find matching position
-                    matching_position = self.find_matching_position(contract_symbol, coinm_positions)
+                    matching_position = self.find_matching_position(contract_symbol)
                     
                     if matching_position:
                         # Process position data
                         future_price, btc_amount, btc_price = self.process_position_data(matching_position, btc_price)
                         
-                        # Update sheet
-                        if self.update_sheet_row(row_index, future_price, btc_amount, btc_price):
-                            processed_count += 1
-                            logger.info(f"Processed: Wallet={wallet}, Symbol={contract_symbol}, "
-                                      f"Future Price={future_price}, BTC Amount={btc_amount}, BTC Price={btc_price}")
-                        else:
-                            logger.error(f"Failed to update sheet for {contract_symbol}")
+                        # Queue sheet update; all rows are written in one batch after the loop
+                        updates.append(self.build_row_update(row_index, future_price, btc_amount, btc_price))
+                        processed_rows.append((wallet, contract_symbol, future_price, btc_amount, btc_price))
                     else:
                         logger.warning(f"No position data found for {contract_symbol}")
                         skipped_count += 1
@@ -271,6 +248,16 @@ class CashAndCarryProcessor:
                     logger.error(f"Error processing row {row_index}: {e}")
                     continue
             
+            # Write K:M for every matched row in a single request
+            if updates:
+                if self.batch_update_with_retry(updates):
+                    processed_count = len(processed_rows)
+                    for wallet, contract_symbol, future_price, btc_amount, btc_price in processed_rows:
+                        logger.info(f"Processed: Wallet={wallet}, Symbol={contract_symbol}, "
+                                  f"Future Price={future_price}, BTC Amount={btc_amount}, BTC Price={btc_price}")
+                else:
+                    logger.error(f"Failed to update sheet for {len(updates)} row(s)")
+            
             logger.info(f"Processing complete. Processed: {processed_count}, Skipped: {skipped_count}")
             
         except Exception as e:
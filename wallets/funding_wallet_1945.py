@@ -3,11 +3,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from dotenv import load_dotenv
 import logging
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from core.binance_get import get_asset_price, get_coinm_position_risk, get_usdtm_position_risk
+from core.retry import backoff_delay, SHEETS_MAX_ATTEMPTS
+from core.sheets_client import get_client, get_sheet
 import time
-import base64
-import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
@@ -51,9 +50,8 @@ class FundingRateProcessor:
         try:
             load_dotenv()
             
-            # Load Google credentials
-            credentials_base64 = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-            if not credentials_base64:
+            # Google credentials are decoded by core.sheets_client; just check they are set
+            if not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
                 raise ConfigError("Environment variable GOOGLE_APPLICATION_CREDENTIALS is not set")
             
             # Load Google Sheet ID
@@ -71,13 +69,6 @@ class FundingRateProcessor:
                     f"API_KEY2: {'Set' if self.api_key else 'NOT SET'}, "
                     f"API_SECRET2: {'Set' if self.api_secret else 'NOT SET'}"
                 )
-            
-            # Decode Google credentials
-            try:
-                credentials_json = base64.b64decode(credentials_base64).decode('utf-8')
-                self.google_credentials = json.loads(credentials_json)
-            except Exception as e:
-                raise ConfigError(f"Error decoding Google credentials: {str(e)}")
                 
         except Exception as e:
             logger.error(f"Failed to load environment: {e}")
@@ -86,18 +77,11 @@ class FundingRateProcessor:
     def setup_google_sheets(self) -> None:
         """Setup Google Sheets connection"""
         try:
-            scope = [
-                "https://spreadsheets.google.com/feeds",
-                "https://www.googleapis.com/auth/drive"
-            ]
-            
-            creds = ServiceAccountCredentials.from_json_keyfile_dict(
-                self.google_credentials, scope
-            )
-            self.client = gspread.authorize(creds)
+            # Shared client: one authorized requests session reused for every sheet call
+            self.client = get_client()
             
             # Open the worksheet
-            self.sheet = self.client.open_by_key(self.google_sheet_id).worksheet(self.worksheet_title)
+            self.sheet = get_sheet(self.worksheet_title, self.google_sheet_id)
             logger.info(f"Successfully connected to Google Sheet: {self.worksheet_title}")
             
         except gspread.exceptions.SpreadsheetNotFound:
@@ -107,7 +91,7 @@ class FundingRateProcessor:
         except Exception as e:
             raise GoogleSheetsError(f"Failed to setup Google Sheets: {str(e)}")
     
-    def update_cell_with_retry(self, row: int, col: int, value: Any, max_attempts: int = 3, sleep_time: int = 300) -> bool:
+    def update_cell_with_retry(self, row: int, col: int, value: Any, max_attempts: int = SHEETS_MAX_ATTEMPTS, base_sleep: float = 1) -> bool:
         """Update a cell with retry logic"""
         for attempt in range(1, max_attempts + 1):
             try:
@@ -117,13 +101,14 @@ class FundingRateProcessor:
             except Exception as e:
                 logger.warning(f"Attempt {attempt}/{max_attempts} failed to update cell ({row}, {col}): {e}")
                 if attempt < max_attempts:
-                    logger.info(f"Retrying in {sleep_time} seconds...")
-                    time.sleep(sleep_time)
+                    delay = backoff_delay(e, attempt, base_sleep)
+                    logger.info(f"Retrying in {delay:.1f} seconds...")
+                    time.sleep(delay)
                 else:
                     logger.error(f"Failed to update cell ({row}, {col}) after {max_attempts} attempts")
                     return False
     
-    def execute_binance_api_with_retry(self, api_function, *args, max_attempts: int = 3, sleep_time: int = 300) -> Optional[Any]:
+    def execute_binance_api_with_retry(self, api_function, *args, max_attempts: int = 3, base_sleep: float = 1) -> Optional[Any]:
         """Execute a Binance API function with retry logic"""
         for attempt in range(1, max_attempts + 1):
             try:
@@ -133,8 +118,9 @@ class FundingRateProcessor:
             except Exception as e:
                 logger.warning(f"Binance API attempt {attempt}/{max_attempts} failed: {e}")
                 if attempt < max_attempts:
-                    logger.info(f"Retrying in {sleep_time} seconds...")
-                    time.sleep(sleep_time)
+                    delay = backoff_delay(e, attempt, base_sleep)
+                    logger.info(f"Retrying in {delay:.1f} seconds...")
+                    time.sleep(delay)
                 else:
                     logger.error(f"Failed to call Binance API after {max_attempts} attempts")
                     return None
@@ -191,11 +177,11 @@ class FundingRateProcessor:
         if wallet != self.wallet_name:
             return False
         
-        if not start_date or start_date.strip() == "":
+        if not start_date or start_date.isspace():
             logger.info(f"Skipping row: Start date (Column E) is empty")
             return False
         
-        if end_date and end_date.strip() != "":
+        if end_date and not end_date.isspace():
             logger.info(f"Skipping row: End date (Column F) already filled")
             return False
         
@@ -240,7 +226,7 @@ class FundingRateProcessor:
             success_l = self.update_cell_with_retry(row_index, 12, position_size)       # Column L - Position Size
             success_m = self.update_cell_with_retry(row_index, 13, unrealized_pnl)      # Column M - Unrealized P&L
             
-            if all([success_i, success_j, success_k, success_l, success_m]):
+            if success_i and success_j and success_k and success_l and success_m:
                 logger.info(f"Successfully updated row {row_index}")
                 return True
             else: